@@ -1,21 +1,102 @@
+import gc
 import logging
+import queue
+import signal
+import threading
 import traceback
-import numpy as np
-import soundfile
 import io
+import json
+import math
+import os
 import struct
-import librosa
-import webrtcvad
-from multiprocessing import Process
-from faster_whisper import WhisperModel
+from multiprocessing import Process, Value, Pipe
 from datetime import datetime
+from time import time, perf_counter
 
 from util import get_today, make_folder
+from log_util import Log
+from profiling import SessionProfiler
+from compaction import compact_segment
 
 logger = logging.getLogger(__name__)
 
+# 엔진 프로세스에서만 사용하는 모듈 (서버 프로세스의 시작 시간/메모리를 줄이기 위해
+# load_engine_modules()에서 import)
+np = None
+soundfile = None
+librosa = None
+webrtcvad = None
+WhisperModel = None
+
+def load_engine_modules():
+    """
+    인식에 필요한 무거운 모듈 import
+
+    Returns
+    -------
+    float
+        import 소요 시간 (초)
+    """
+    global np, soundfile, librosa, webrtcvad, WhisperModel
+    started = time()
+    import numpy as np
+    import soundfile
+    import librosa
+    import webrtcvad
+    from faster_whisper import WhisperModel
+    return time() - started
+
+def deinterleave(pcm, channels):
+    """
+    인터리브된 다채널 16bit PCM을 채널별 PCM으로 분리
+
+    Parameters
+    ----------
+    pcm : bytearray
+        인터리브된 PCM 데이터
+    channels : int
+        채널 수
+
+    Returns
+    -------
+    tuple
+        (채널별 PCM 리스트, 채널 수의 배수가 되지 않아 남은 바이트)
+    """
+    usable = len(pcm) - len(pcm) % (2 * channels)
+    # (샘플 수, 채널 수) 배열의 열은 복사 없이 채널별 strided view
+    samples = np.frombuffer(pcm, dtype='<i2', count=usable // 2).reshape(-1, channels)
+    return [samples[:, channel].tobytes() for channel in range(channels)], pcm[usable:]
+
+class ChannelStream:
+    """세션 채널 하나의 오디오 데이터와 음성 구간 검출 상태"""
+
+    def __init__(self, index, vad):
+        """
+        채널 상태 초기화
+
+        Parameters
+        ----------
+        index : int
+            채널 번호 (0부터)
+        vad : webrtcvad.Vad
+            채널 전용 VAD 인스턴스
+        """
+        self.index = index
+        self.vad = vad
+        self.wavData = None
+        self.vad_index = 0
+        self.epd_start = -1
+        self.triggered = False
+        self.epd_state = 0
+        self.silence_cnt = 0
+        self.speech_flags = bytearray()
+
 class ASRConfig:
     """ASR 설정을 관리하는 클래스"""
+    # 엔진 재시작 없이 실행 중에 바꿀 수 있는 설정
+    RUNTIME_KEYS = ('vad_mode', 'socket_timeout', 'resume_grace', 'backlog_policy', 'lag_threshold',
+                    'save_pcm', 'pcm_path', 'compact_silence', 'compact_gap_ms', 'compact_edge_ms')
+
     def __init__(self, **kwargs):
         # 오디오 설정
         self.frame_size = kwargs.get('frame_size', 480)  # 16000Hz * 30ms = 480
@@ -24,23 +105,42 @@ class ASRConfig:
         
         # VAD 설정
         self.vad_mode = kwargs.get('vad_mode', 1)
+        self.compact_silence = kwargs.get('compact_silence', False)  # 인식 전 음성 구간 안의 무음 압축
+        self.compact_gap_ms = kwargs.get('compact_gap_ms', 200)  # 압축 후 남길 무음 길이 (밀리초)
+        self.compact_edge_ms = kwargs.get('compact_edge_ms', 100)  # 앞뒤에 남길 무음 길이 (밀리초)
         
         # 네트워크 설정
         self.socket_timeout = kwargs.get('socket_timeout', 60)
+        self.resume_grace = kwargs.get('resume_grace', 0)  # 연결이 끊긴 세션의 재연결 대기 시간 (초)
+        
+        # 처리 지연 대응 설정
+        self.backlog_policy = kwargs.get('backlog_policy', 'block')  # block, drop_oldest, shed
+        self.lag_threshold = kwargs.get('lag_threshold', 3.0)  # 지연 판단 기준 (초)
         
         # 모델 설정
         self.model_size = kwargs.get('model_size', 'base')
         self.device = kwargs.get('device', 'cpu')
         self.language = kwargs.get('language', 'ko')
+        self.lazy_load = kwargs.get('lazy_load', False)
+        
+        # CPU 설정
+        self.cpu_threads = kwargs.get('cpu_threads', 0)  # 엔진당 연산 스레드 수 (0 = CTranslate2 기본값)
+        self.num_workers = kwargs.get('num_workers', 1)
+        self.cpu_affinity = kwargs.get('cpu_affinity', None)  # 엔진 프로세스를 고정할 CPU 번호 리스트
         
         # 로깅 설정 추가
         self.save_pcm = kwargs.get('save_pcm', False)
         self.pcm_path = kwargs.get('pcm_path', 'pcm_files')
 
+    def diff(self, other):
+        """다른 설정과 값이 다른 항목 이름 리스트 반환"""
+        return [key for key, value in vars(other).items() if getattr(self, key, None) != value]
+
 class ASRProcess(Process):
     """실시간 음성 인식을 처리하는 프로세스 클래스"""
 
-    def __init__(self, engine_name, data_queue, process_logger, config=None):
+    def __init__(self, engine_name, data_queue, process_logger, config=None, preload=None,
+                 log_queue=None):
         """
         ASR 프로세스 초기화
         
@@ -52,6 +152,11 @@ class ASRProcess(Process):
             데이터 큐 [입력큐, 출력큐]
         config : ASRConfig, optional
             ASR 설정 객체. None인 경우 기본값 사용
+        preload : bool, optional
+            시작 시 모델 로드 및 warm-up 여부. None인 경우 config.lazy_load 반대값
+        log_queue : Queue, optional
+            로그 큐. spawn/forkserver로 시작한 엔진은 로거 설정을 물려받지 않으므로
+            엔진에서 이 큐로 로거를 다시 설정
         """
         super().__init__()
         self.data_in = data_queue[0]
@@ -59,6 +164,118 @@ class ASRProcess(Process):
         self.engine_name = engine_name
         self.config = config or ASRConfig()
         self.logger = process_logger
+        self.log_queue = log_queue
+        self.log_level = process_logger.level
+        self.preload = not self.config.lazy_load if preload is None else preload
+        
+        # 제어 채널 (서버 측, 엔진 측)
+        self.control_parent, self.control_child = Pipe()
+        self.control_lock = None
+        
+        # Whisper 모델 (제어 채널의 unload 요청으로 해제할 수 있도록 속성으로 보관)
+        self.whisper_model = None
+        self.model_lock = None
+        
+        # 결과 도착 알림 채널 (출력 큐에 넣을 때마다 1바이트, 서버의 결과 전달 스레드가 감시)
+        # 결과 전달 스레드가 멈춰도 엔진이 막히지 않도록 쓰기는 non-blocking
+        self.result_notify, self.result_notify_send = Pipe(duplex=False)
+        os.set_blocking(self.result_notify_send.fileno(), False)
+        
+        # 세션별 수신/처리 오디오 바이트 수 (서버와 공유, 지연 측정용)
+        self.audio_received = Value('q', 0, lock=False)
+        self.audio_processed = Value('q', 0, lock=False)
+        
+        # 프로파일링 요청 (관리자 profile 명령) 및 현재 세션의 단계별 시간 기록
+        # stage_timer가 None이면 측정하지 않음
+        self.profile_mode = None
+        self.profile_sessions = 0
+        self.profile_dir = None
+        self.stage_timer = None
+        
+        # 현재 처리 중인 채널의 프레임별 VAD 결과 (1: 음성, 무음 압축에 사용)
+        self.speech_flags = bytearray()
+        
+        # 세션 채널 수와 현재 처리 중인 채널 번호 (다채널 세션은 결과에 채널 표시)
+        self.channels = 1
+        self.channel = 0
+        
+        # 세션 결과 형식 (text, json)과 단어 단위 시간 사용 여부 (json 전용)
+        self.result_format = 'text'
+        self.word_timestamps = False
+
+    def lag_seconds(self):
+        """수신했지만 아직 처리하지 못한 오디오 길이 (초)"""
+        lag_bytes = self.audio_received.value - self.audio_processed.value
+        return max(lag_bytes, 0) / (self.config.sample_rate * 2)
+
+    def is_lagging(self):
+        """처리 지연이 기준을 넘었는지 여부"""
+        return self.lag_seconds() > self.config.lag_threshold
+
+    def emit(self, code, data):
+        """
+        결과 패킷을 출력 큐에 전달
+        
+        출력 큐가 가득 찬 경우 서버가 결과를 가져갈 때까지 대기 (역압력)
+        """
+        try:
+            self.data_out.put((code, data), timeout=self.config.socket_timeout)
+        except queue.Full:
+            self.logger.error(f'Engine[{self.engine_name}] : OUTPUT_QUEUE_FULL : code[{code}]')
+            return
+        self.notify_result()
+
+    def notify_result(self):
+        """
+        결과 전달 스레드에 출력 큐 결과 도착 알림
+
+        알림 pipe가 가득 찬 경우는 이미 읽지 않은 알림이 남아 있으므로 무시
+        """
+        try:
+            self.result_notify_send.send_bytes(b'\0')
+        except BlockingIOError:
+            pass
+
+    def get_decode_options(self):
+        """
+        디코딩 옵션 반환
+        
+        shed 정책에서 처리가 지연된 경우 빠른 디코딩(greedy) 옵션 사용
+        """
+        if self.config.backlog_policy == 'shed' and self.is_lagging():
+            return {'beam_size': 1, 'best_of': 1}
+        return {'beam_size': 5}
+
+    def skip_backlog(self, wavData, vad_index, vad):
+        """
+        drop_oldest 정책에서 밀린 오디오 중 무음 프레임을 음성 구간 검출 없이 건너뜀
+        
+        음성 구간 밖에서만 호출. 밀린 프레임에도 VAD를 적용하여 음성으로 판단된 첫 프레임
+        앞에서 멈추므로 밀린 오디오 안의 음성 시작은 버리지 않음. 시간 정보 유지를 위해
+        데이터는 유지하고 분석 위치(vad_index)만 프레임 단위로 이동
+        """
+        while vad_index + self.config.frame_size <= len(wavData):
+            frame = wavData[vad_index:vad_index+self.config.frame_size+1]
+            if vad.is_speech(frame, self.config.sample_rate):
+                break
+            self.speech_flags.append(0)
+            vad_index += self.config.frame_size
+        return vad_index
+
+    def compact_audio(self, wavData, epd_start, vad_index):
+        """
+        음성 구간의 무음 압축 (프레임별 VAD 결과 사용)
+        
+        Returns
+        -------
+        tuple
+            (압축한 PCM 데이터, OffsetMap)
+        """
+        frame_ms = self.config.frame_duration_ms
+        return compact_segment(wavData, epd_start, min(vad_index + self.config.frame_size, len(wavData)),
+                               self.speech_flags, self.config.frame_size, self.config.sample_rate,
+                               self.config.compact_gap_ms // frame_ms,
+                               self.config.compact_edge_ms // frame_ms)
 
     def process_audio_segment(self, wavData, epd_start, vad_index, frame_start, whisper_model):
         """
@@ -77,48 +294,94 @@ class ASRProcess(Process):
         whisper_model : WhisperModel
             Whisper 모델 인스턴스
         """
-        epd_start_time = (epd_start//self.config.frame_size) * (self.config.frame_duration_ms/1000)
-        epdbuffer = wavData[epd_start:vad_index+self.config.frame_size+1]
+        timer = self.stage_timer
+        if timer is not None:
+            started = perf_counter()
+        if self.config.compact_silence:
+            # 무음을 줄인 오디오로 인식하고, 시간은 원래 스트림 기준으로 변환
+            epdbuffer, offset_map = self.compact_audio(wavData, epd_start, vad_index)
+            epd_start_time, epd_end_time = offset_map.start, offset_map.end
+            to_stream = offset_map.to_original
+            if timer is not None:
+                started = timer.add('compact', started)
+        else:
+            epd_start_time = (epd_start//self.config.frame_size) * (self.config.frame_duration_ms/1000)
+            epd_end_time = frame_start+(self.config.frame_duration_ms/1000)
+            epdbuffer = wavData[epd_start:vad_index+self.config.frame_size+1]
+            to_stream = lambda seconds: epd_start_time + seconds
         
-        # 오디오 파일 생성 및 리샘플링
-        sf = soundfile.SoundFile(
-            io.BytesIO(np.array(epdbuffer)), 
-            channels=1,
-            endian="LITTLE",
-            samplerate=self.config.sample_rate, 
-            subtype="PCM_16",
-            format="RAW"
-        )
-        audio, _ = librosa.load(sf, sr=self.config.sample_rate)
-        y_resampled = librosa.resample(audio, orig_sr=self.config.sample_rate, target_sr=16000)
+        y_resampled = self.load_segment_audio(epdbuffer)
+        if timer is not None:
+            started = timer.add('resample', started)
         
         # Whisper 모델을 통한 음성 인식
         segments, _ = whisper_model.transcribe(
             y_resampled, 
             language=self.config.language, 
-            beam_size=5, 
             condition_on_previous_text=False,
             log_prob_threshold=0.4, 
-            vad_filter=True
+            vad_filter=True,
+            word_timestamps=self.word_timestamps,
+            **self.get_decode_options()
         )
         
         # 인식 결과 텍스트 생성
+        if self.result_format == 'json':
+            segments = list(segments)
         result_text = self.combine_segments(segments)
+        if timer is not None:
+            started = timer.add('decode', started)
         
         if result_text:
-            resultTxt = f'{epd_start_time:3.1f} {frame_start+(self.config.frame_duration_ms/1000):3.1f} : {result_text}'
-            self.data_out.put_nowait(('%R', resultTxt))
+            if self.result_format == 'json':
+                resultTxt = self.build_json_result(segments, result_text, to_stream,
+                                                   epd_start_time, epd_end_time)
+            else:
+                channel = f' ch{self.channel}' if self.channels > 1 else ''
+                resultTxt = f'{epd_start_time:3.1f} {epd_end_time:3.1f}{channel} : {result_text}'
+            self.emit('%R', resultTxt)
+            if timer is not None:
+                timer.add('emit', started)
             
         return result_text
+    def load_segment_audio(self, epdbuffer):
+        """
+        PCM 구간을 16kHz float 오디오로 변환
+        
+        Parameters
+        ----------
+        epdbuffer : bytes
+            16bit PCM 데이터
+        """
+        # 오디오 파일 생성 및 리샘플링
+        sf = soundfile.SoundFile(
+            io.BytesIO(np.array(epdbuffer)), 
+            channels=1,
+            endian="LITTLE",
+            samplerate=self.config.sample_rate, 
+            subtype="PCM_16",
+            format="RAW"
+        )
+        audio, _ = librosa.load(sf, sr=self.config.sample_rate)
+        return librosa.resample(audio, orig_sr=self.config.sample_rate, target_sr=16000)
+
     def process_voice_data(self, wavData, vad_index, 
                           vad, triggered, epd_start, silence_cnt, epd_state, whisper_model):
         """음성 데이터 처리 및 VAD 적용"""
+        timer = self.stage_timer
         # VAD 처리
         while vad_index + self.config.frame_size <= len(wavData):
             frame = wavData[vad_index:vad_index+self.config.frame_size+1]
             frame_start = (vad_index//self.config.frame_size) * (self.config.frame_duration_ms/1000)
             
-            if vad.is_speech(frame, self.config.sample_rate):
+            if timer is not None:
+                started = perf_counter()
+            is_speech = vad.is_speech(frame, self.config.sample_rate)
+            if timer is not None:
+                timer.add('vad', started)
+            self.speech_flags.append(is_speech)
+            
+            if is_speech:
                 if not triggered:
                     # 음성 구간 시작
                     triggered = True
@@ -164,28 +427,144 @@ class ASRProcess(Process):
         segments : list
             인식된 세그먼트 리스트
         """
-        result_text = None
+        return ' '.join(segment.text for segment in segments) or None
+
+    def build_json_result(self, segments, result_text, to_stream, epd_start_time, epd_end_time):
+        """
+        JSON 인식 결과 생성 (시간은 스트림 시작 기준, 초)
+        
+        Parameters
+        ----------
+        segments : list
+            인식된 세그먼트 리스트
+        result_text : str
+            결합한 결과 텍스트
+        to_stream : callable
+            인식한 오디오 기준 시간을 스트림 기준 시간으로 변환하는 함수
+        epd_start_time : float
+            음성 구간 시작 시간
+        epd_end_time : float
+            음성 구간 종료 시간
+        """
+        result = {'start': round(epd_start_time, 2), 'end': round(epd_end_time, 2),
+                  'text': result_text.strip(), 'segments': []}
+        if self.channels > 1:
+            result['channel'] = self.channel
         for segment in segments:
-            if result_text:
-                result_text = f"{result_text} {segment.text}"
-            else:
-                result_text = segment.text
-        return result_text
+            item = {'start': round(to_stream(segment.start), 2),
+                    'end': round(to_stream(segment.end), 2),
+                    'text': segment.text.strip(),
+                    'confidence': round(math.exp(segment.avg_logprob), 3),
+                    'no_speech_prob': round(segment.no_speech_prob, 3)}
+            if self.word_timestamps:
+                item['words'] = [{'start': round(to_stream(word.start), 2),
+                                  'end': round(to_stream(word.end), 2),
+                                  'word': word.word,
+                                  'probability': round(word.probability, 3)}
+                                 for word in segment.words or []]
+            result['segments'].append(item)
+        return json.dumps(result, ensure_ascii=False)
 
     def handle_illegal_packet(self, header):
-        """잘못된 패킷 처리"""
-        self.data_out.put_nowait(('%F', None))
+        """
+        잘못된 패킷 처리
+
+        Returns
+        -------
+        str
+            세션 종료 사유 (%F 패킷 데이터)
+        """
         error_msg = f'Engine[{self.engine_name}] : ILLEGAL_PACKET : header[{header}]'
         logger.error(error_msg)
+        return 'ILLEGAL_PACKET'
         
     def initialize_whisper_model(self):
         """Whisper 모델 초기화"""
         return WhisperModel(
             self.config.model_size,
             device=self.config.device,
-            compute_type="int8"
+            compute_type="int8",
+            cpu_threads=self.config.cpu_threads,
+            num_workers=self.config.num_workers
         )
 
+    def warm_up(self, whisper_model):
+        """
+        첫 요청 지연을 줄이기 위해 무음으로 한 번 인식 수행
+
+        librosa 하위 모듈 로드와 리샘플링 준비도 첫 세션에서 일어나지 않도록
+        세션과 같은 변환 경로를 사용
+        """
+        segments, _ = whisper_model.transcribe(
+            self.load_segment_audio(bytearray(self.config.sample_rate * 2)),
+            language=self.config.language,
+            beam_size=1
+        )
+        list(segments)
+
+    def send_control(self, *message):
+        """제어 채널로 서버에 메시지 전송"""
+        with self.control_lock:
+            self.control_child.send(message)
+
+    def control_loop(self):
+        """제어 채널 처리 스레드 (heartbeat 응답)"""
+        while True:
+            try:
+                message = self.control_child.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == 'ping':
+                self.send_control('pong', message[1])
+            elif message[0] == 'config':
+                # 실행 중 변경 가능한 설정 적용 (다음 세션부터 반영되는 항목 포함)
+                for key, value in message[1].items():
+                    setattr(self.config, key, value)
+                self.logger.info(f'Engine[{self.engine_name}] : 설정 변경 {message[1]}')
+            elif message[0] == 'unload':
+                # 모델 해제 요청 (메모리 한도 초과 시 LRU 교체, 서버는 유휴 엔진에만 요청)
+                with self.model_lock:
+                    self.whisper_model = None
+                gc.collect()
+                self.logger.info(f'Engine[{self.engine_name}] : 모델 해제')
+                self.send_control('unloaded')
+            elif message[0] == 'log_level':
+                self.log_level = message[1]
+                self.logger.setLevel(message[1])
+            elif message[0] == 'profile':
+                # 다음 N개 세션 프로파일링 (0이면 취소)
+                _, self.profile_mode, self.profile_dir, self.profile_sessions = message
+                self.logger.info(f'Engine[{self.engine_name}] : 프로파일링 요청 '
+                                 f'mode[{self.profile_mode}] sessions[{self.profile_sessions}]')
+
+    def start_profiler(self, username):
+        """
+        프로파일링 요청이 남아 있으면 세션 프로파일러 시작
+
+        Returns
+        -------
+        SessionProfiler or None
+            시작한 프로파일러. 요청이 없으면 None
+        """
+        if self.profile_sessions <= 0:
+            return None
+        self.profile_sessions -= 1
+        profiler = SessionProfiler(self.profile_mode, self.profile_dir, self.engine_name, username)
+        self.stage_timer = profiler.timer
+        profiler.start()
+        return profiler
+
+    def stop_profiler(self, profiler, wavData):
+        """세션 프로파일러 종료 및 결과 저장"""
+        self.stage_timer = None
+        try:
+            audio_seconds = len(wavData) / (self.config.sample_rate * 2) if wavData else 0.0
+            path = profiler.stop(audio_seconds)
+            self.logger.info(f'Engine[{self.engine_name}] : 프로파일 저장 - {path} '
+                             f'(남은 세션[{self.profile_sessions}])')
+        except Exception as e:
+            self.logger.exception(f'Engine[{self.engine_name}] : 프로파일 저장 실패 - {e.__class__.__name__}:{e}')
+
     def save_log(self, wavData, username):
         """
         음성 데이터와 로그를 저장
@@ -225,75 +604,190 @@ class ASRProcess(Process):
         ----------
         e : Exception
             처리할 예외 객체
+
+        Returns
+        -------
+        str
+            세션 종료 사유 (%F 패킷 데이터)
         """
         error_msg = f"Engine[{self.engine_name}] : {e.__class__.__name__}:{str(e)}"
         self.logger.error(error_msg)
         self.logger.exception(e)
-        self.data_out.put_nowait(('%F', None))
+        return 'ENGINE_ERROR'
+
+    def select_stream(self, stream):
+        """처리할 채널 지정 (VAD 결과와 결과 채널 표시에 사용)"""
+        self.speech_flags = stream.speech_flags
+        self.channel = stream.index
+
+    def process_stream(self, stream, buf, whisper_model):
+        """
+        채널 하나에 오디오를 추가하고 VAD/인식 수행
+        
+        Parameters
+        ----------
+        stream : ChannelStream
+            채널 상태
+        buf : bytes
+            채널의 PCM 데이터
+        whisper_model : WhisperModel
+            Whisper 모델 인스턴스
+        """
+        self.select_stream(stream)
+        if stream.wavData is None:
+            stream.wavData = bytearray(buf)
+        else:
+            stream.wavData.extend(buf)
+
+        if (self.config.backlog_policy == 'drop_oldest'
+                and not stream.triggered and self.is_lagging()):
+            stream.vad_index = self.skip_backlog(stream.wavData, stream.vad_index, stream.vad)
+
+        (stream.wavData, stream.triggered, stream.epd_start, stream.silence_cnt,
+         stream.epd_state, stream.vad_index) = \
+            self.process_voice_data(stream.wavData,
+                                    stream.vad_index, stream.vad, stream.triggered, stream.epd_start,
+                                    stream.silence_cnt, stream.epd_state, whisper_model)
+
+    def run_session(self, username, vad, whisper_model, channels=1, result_format='text',
+                    word_timestamps=False):
+        """
+        세션 하나 처리 (%b 이후 %f까지의 패킷을 입력 큐에서 읽어 인식)
+        
+        Parameters
+        ----------
+        username : str
+            사용자 이름
+        vad : webrtcvad.Vad
+            VAD 인스턴스
+        whisper_model : WhisperModel
+            Whisper 모델 인스턴스
+        channels : int
+            오디오 채널 수. 2 이상이면 인터리브된 PCM을 채널별로 나누어
+            채널마다 독립적으로 음성 구간을 검출하고 같은 모델로 인식
+        result_format : str
+            결과 형식 (text: '시작 끝 : 텍스트', json: 세그먼트별 시간/신뢰도 포함)
+        word_timestamps : bool
+            json 결과에 단어 단위 시간 포함 여부 (추가 정렬 연산이 필요하므로 요청 시에만 사용)
+        """
+        # 변수 초기화
+        isStart = True
+        
+        self.audio_processed.value = 0
+        self.channels = channels
+        self.result_format = result_format
+        self.word_timestamps = word_timestamps and result_format == 'json'
+        vad.set_mode(self.config.vad_mode)
+        streams = [ChannelStream(0, vad)]
+        for index in range(1, channels):
+            streams.append(ChannelStream(index, webrtcvad.Vad(self.config.vad_mode)))
+        pending = bytearray()  # 채널 수의 배수가 되지 않아 다음 패킷으로 넘기는 바이트
+        
+        # 세션 종료 사유 (정상 종료 시 None)
+        reason = None
+        profiler = self.start_profiler(username)
+        try:
+            while isStart:
+                # 데이터 수신
+                # 서버가 연결이 끊긴 세션의 재연결을 기다리는 동안에는 입력이 없음
+                (header, buf) = self.data_in.get(
+                    timeout=self.config.socket_timeout + self.config.resume_grace + 1)
+                
+                if header == b'%f':
+                    # 종료 패킷
+                    for stream in streams:
+                        self.select_stream(stream)
+                        self.handle_finish_packet(stream.wavData, stream.triggered,
+                                                  stream.epd_start, whisper_model)
+                    isStart = False
+                    
+                elif header == b'%s':
+                    # 음성 데이터 처리
+                    if channels > 1:
+                        pending.extend(buf)
+                        bufs, pending = deinterleave(pending, channels)
+                    else:
+                        bufs = [buf]
+                    for stream, channel_buf in zip(streams, bufs):
+                        self.process_stream(stream, channel_buf, whisper_model)
+                    self.audio_processed.value = min(stream.vad_index for stream in streams)
+                else:
+                    # 잘못된 패킷 처리
+                    reason = self.handle_illegal_packet(header)
+                    isStart = False
+                    
+        except Exception as e:
+            reason = self.handle_error(e)
+        finally:
+            # 세션 종료 신호는 여기서 한 번만 전달
+            self.emit('%F', reason)
+            if profiler is not None:
+                self.stop_profiler(profiler, streams[0].wavData)
+            # 로그 저장 (다채널 세션은 채널별 파일)
+            for stream in streams:
+                self.save_log(stream.wavData,
+                              username if channels == 1 else f'{username}_ch{stream.index}')
 
     def run(self):
         """ASR 프로세스 실행"""
         try:
-            self.logger.info(f'[{self.engine_name}] 프로세스 초기화 성공')
+            # spawn/forkserver로 시작한 경우 로거 다시 설정
+            if self.log_queue is not None and not self.logger.handlers:
+                self.logger = Log().config_queue_log(self.log_queue, self.log_level, self.logger.name)
+
+            # 종료는 서버가 %q 패킷으로 관리
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            
+            # CPU 고정
+            if self.config.cpu_affinity:
+                os.sched_setaffinity(0, self.config.cpu_affinity)
+            
+            # 인식 모듈 로드
+            timings = {'import': load_engine_modules()}
+
+            # 제어 채널 스레드 시작
+            self.control_lock = threading.Lock()
+            self.model_lock = threading.Lock()
+            threading.Thread(target=self.control_loop, daemon=True).start()
+            self.logger.info(f'[{self.engine_name}] 프로세스 초기화 성공 '
+                             f'(cpu_threads[{self.config.cpu_threads}] cpu_affinity[{self.config.cpu_affinity}])')
             
             # VAD 초기화
             vad = webrtcvad.Vad()
             vad.set_mode(self.config.vad_mode)
             
-            # Whisper 모델 초기화
-            whisper_model = self.initialize_whisper_model()
+            # Whisper 모델 초기화 (preload가 아닌 경우 첫 세션에서 로드)
+            if self.preload:
+                started = time()
+                self.whisper_model = self.initialize_whisper_model()
+                timings['load'] = time() - started
+                started = time()
+                self.warm_up(self.whisper_model)
+                timings['warm_up'] = time() - started
+            self.send_control('ready', self.whisper_model is not None, timings)
             
             while True:
-                # 변수 초기화
-                wavData = None
-                isStart = True
-                vad_index = 0
-                epd_start = -1
-                triggered = False
-                epd_state = 0
-                silence_cnt = 0
-                
                 # 사용자 정보 수신
                 (header, buf) = self.data_in.get()
+                if header == b'%q':
+                    # 엔진 종료 요청
+                    self.logger.info(f'Engine[{self.engine_name}] : 종료')
+                    break
                 if header != b'%b':
                     continue
-                username = buf
+
+                with self.model_lock:
+                    if self.whisper_model is None:
+                        started = time()
+                        self.whisper_model = self.initialize_whisper_model()
+                        self.logger.info(f'Engine[{self.engine_name}] : 모델 로드 ({self.config.model_size}) '
+                                         f'load[{time() - started:.2f}s]')
+                        self.send_control('loaded')
                 
-                try:
-                    epdProcessedByteN = 0
-                    retResult = None
-
-                    while isStart:
-                        # 데이터 수신
-                        (header, buf) = self.data_in.get(timeout=self.config.socket_timeout+1)
-                        
-                        if header == b'%f':
-                            # 종료 패킷
-                            self.handle_finish_packet(wavData, triggered, epd_start, whisper_model)
-                            isStart = False
-                            
-                        elif header == b'%s':
-                            # 음성 데이터 처리
-                            if wavData is None:
-                                wavData = buf
-                            else:
-                                wavData.extend(buf)
-
-                            wavData, triggered, epd_start, silence_cnt, epd_state, vad_index = \
-                                self.process_voice_data(wavData,
-                                                        vad_index, vad, triggered, epd_start,
-                                                        silence_cnt, epd_state, whisper_model)
-                        else:
-                            # 잘못된 패킷 처리
-                            self.handle_illegal_packet(header)
-                            isStart = False
-                            
-                except Exception as e:
-                    self.handle_error(e)
-                finally:
-                    self.data_out.put_nowait(('%F', None))
-                    # 로그 저장
-                    self.save_log(wavData, username)
+                username, session_options = buf
+                self.run_session(username, vad, self.whisper_model, **session_options)
                     
         except Exception as e:
             self.handle_error(e)
\ No newline at end of file
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# encoding :utf-8
+
+import multiprocessing
+import os
+import time
+import configargparse
+import numpy as np
+
+from cpu_topology import CpuPlanner, available_cpus
+
+def load_audio(path, sample_rate, duration):
+    """
+    벤치마크용 오디오 로드 (16kHz float32)
+
+    Parameters
+    ----------
+    path : str
+        PCM 파일 경로 (16bit mono). None인 경우 잡음 신호 생성
+    sample_rate : int
+        PCM 파일 샘플링 레이트
+    duration : float
+        사용할 오디오 길이 (초)
+    """
+    if path:
+        audio = np.fromfile(path, dtype='<i2').astype(np.float32) / 32768.0
+        if sample_rate != 16000:
+            import librosa
+            audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=16000)
+    else:
+        audio = np.random.default_rng(0).normal(0, 0.1, 16000 * int(duration)).astype(np.float32)
+
+    length = int(16000 * duration)
+    if len(audio) < length:
+        audio = np.tile(audio, length // len(audio) + 1)
+    return audio[:length]
+
+def bench_worker(args, threads, cpus, audio, barrier, result_queue):
+    """엔진 하나를 흉내 내어 같은 오디오를 반복 인식하고 소요 시간 반환"""
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(args.model, device=args.device, compute_type='int8',
+                         cpu_threads=threads, num_workers=args.num_workers)
+    segments, _ = model.transcribe(audio[:16000], language=args.language, beam_size=1)
+    list(segments)
+
+    barrier.wait()
+    start = time.time()
+    for _ in range(args.repeat):
+        segments, _ = model.transcribe(audio, language=args.language, beam_size=5,
+                                       condition_on_previous_text=False)
+        list(segments)
+    result_queue.put(time.time() - start)
+
+def run_case(args, audio, engines, threads):
+    """
+    엔진 수 x 스레드 수 조합 하나를 측정
+
+    Returns
+    -------
+    tuple
+        (초당 처리한 오디오 길이 합계, 엔진별 평균 RTF)
+    """
+    planner = CpuPlanner(engines, threads, args.num_workers, args.pin)
+    barrier = multiprocessing.Barrier(engines + 1)
+    result_queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=bench_worker,
+                                       args=(args, threads, planner.assign(str(i)), audio,
+                                             barrier, result_queue))
+               for i in range(engines)]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = time.time()
+    elapsed = [result_queue.get() for _ in workers]
+    wall = time.time() - start
+    for worker in workers:
+        worker.join()
+
+    audio_seconds = len(audio) / 16000 * args.repeat
+    throughput = audio_seconds * engines / wall
+    rtf = sum(elapsed) / len(elapsed) / audio_seconds
+    return throughput, rtf
+
+def get_cases(cores, max_engines):
+    """측정할 (엔진 수, 스레드 수) 조합 생성"""
+    cases = []
+    threads = 1
+    while threads <= cores:
+        engines = 1
+        while engines * threads <= cores and engines <= max_engines:
+            cases.append((engines, threads))
+            engines *= 2
+        if (cores // threads) not in (case[0] for case in cases if case[1] == threads):
+            if cores // threads <= max_engines:
+                cases.append((cores // threads, threads))
+        threads *= 2
+    return cases
+
+def get_parser():
+    """설정 파서 생성"""
+    parser = configargparse.ArgumentParser(
+        description='엔진 수 x 스레드 수 조합별 처리량 측정',
+        config_file_parser_class=configargparse.YAMLConfigFileParser,
+        formatter_class=configargparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--model', type=str, default='small',
+                       help='모델 크기')
+    parser.add_argument('--device', type=str, default='cpu',
+                       help='실행 장치')
+    parser.add_argument('--language', type=str, default='ko',
+                       help='인식 언어')
+    parser.add_argument('--ifn', type=str, default=None,
+                       help='입력 PCM 파일 경로 (없으면 잡음 신호 사용)')
+    parser.add_argument('--sample-rate', type=int, default=8000,
+                       help='입력 PCM 샘플링 레이트')
+    parser.add_argument('--duration', type=float, default=10.0,
+                       help='인식할 오디오 길이 (초)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='엔진별 반복 횟수')
+    parser.add_argument('--max-engines', type=int, default=16,
+                       help='측정할 최대 엔진 수')
+    parser.add_argument('--num-workers', type=int, default=1,
+                       help='엔진당 CTranslate2 worker 수')
+    parser.add_argument('--pin', action='store_true',
+                       help='엔진 프로세스를 CPU 집합에 고정')
+
+    return parser
+
+if __name__ == '__main__':
+    args = get_parser().parse_args()
+    audio = load_audio(args.ifn, args.sample_rate, args.duration)
+    cores = len(available_cpus())
+    print(f'CPU 코어 수: {cores}')
+
+    results = []
+    print(f"{'engines':>8} {'threads':>8} {'throughput(x)':>14} {'rtf':>8}")
+    for engines, threads in get_cases(cores, args.max_engines):
+        throughput, rtf = run_case(args, audio, engines, threads)
+        results.append((engines, threads, throughput, rtf))
+        print(f'{engines:>8} {threads:>8} {throughput:>14.2f} {rtf:>8.3f}')
+
+    # 실시간 처리가 가능한(RTF < 1) 조합 중 처리량이 가장 높은 조합 추천
+    realtime = [result for result in results if result[3] < 1.0] or results
+    engines, threads, throughput, rtf = max(realtime, key=lambda result: result[2])
+    print(f'\n추천 설정: model.channel={engines}, cpu.threads_per_engine={threads} '
+          f'(throughput {throughput:.2f}x, rtf {rtf:.3f})')
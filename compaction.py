@@ -0,0 +1,120 @@
+class OffsetMap:
+    """압축한 오디오의 시간을 원래 스트림 시간으로 변환하는 클래스"""
+
+    def __init__(self, bytes_per_second):
+        """
+        변환 정보 초기화
+
+        Parameters
+        ----------
+        bytes_per_second : int
+            PCM 초당 바이트 수 (sample_rate * 2)
+        """
+        self.bytes_per_second = bytes_per_second
+        self.runs = []  # (압축 후 시작 바이트, 원래 시작 바이트, 길이)
+        self.length = 0
+
+    def add(self, original_start, length):
+        """원래 스트림의 구간 하나를 압축 오디오 뒤에 추가"""
+        self.runs.append((self.length, original_start, length))
+        self.length += length
+
+    def to_original(self, seconds):
+        """
+        압축 오디오 기준 시간을 원래 스트림 시간으로 변환
+
+        Parameters
+        ----------
+        seconds : float
+            압축 오디오 기준 시간 (초)
+
+        Returns
+        -------
+        float
+            원래 스트림 기준 시간 (초)
+        """
+        position = seconds * self.bytes_per_second
+        for compact_start, original_start, length in self.runs:
+            if position < compact_start + length:
+                return (original_start + max(position - compact_start, 0)) / self.bytes_per_second
+        compact_start, original_start, length = self.runs[-1]
+        return (original_start + length) / self.bytes_per_second
+
+    @property
+    def start(self):
+        """압축 오디오 시작의 원래 스트림 시간 (초)"""
+        return self.to_original(0)
+
+    @property
+    def end(self):
+        """압축 오디오 끝의 원래 스트림 시간 (초)"""
+        return self.to_original(self.length / self.bytes_per_second)
+
+def compact_segment(wavData, start, end, speech_flags, frame_size, sample_rate,
+                    gap_frames, edge_frames):
+    """
+    음성 구간 안의 긴 무음을 짧은 간격으로 줄이고 앞뒤 무음을 잘라냄
+
+    Parameters
+    ----------
+    wavData : bytearray
+        세션 전체 PCM 데이터
+    start : int
+        구간 시작 바이트 (프레임 경계)
+    end : int
+        구간 끝 바이트
+    speech_flags : bytearray
+        세션 프레임별 VAD 결과 (1: 음성). 판단하지 않은 프레임은 음성으로 취급
+    frame_size : int
+        프레임 크기 (바이트)
+    sample_rate : int
+        샘플링 레이트
+    gap_frames : int
+        구간 안의 무음을 줄였을 때 남길 프레임 수
+    edge_frames : int
+        앞뒤에 남길 무음 프레임 수
+
+    Returns
+    -------
+    tuple
+        (압축한 PCM 데이터, OffsetMap)
+    """
+    first_frame = start // frame_size
+    frame_count = -(-(end - start) // frame_size)
+    speech = [speech_flags[first_frame + i] if first_frame + i < len(speech_flags) else 1
+              for i in range(frame_count)]
+
+    offset_map = OffsetMap(sample_rate * 2)
+    if not any(speech):
+        offset_map.add(start, end - start)
+        return wavData[start:end], offset_map
+
+    first = speech.index(1)
+    last = frame_count - speech[::-1].index(1)
+
+    # 남길 프레임 범위 계산
+    ranges = []
+    range_start = max(0, first - edge_frames)
+    i = first
+    while i < last:
+        if speech[i]:
+            i += 1
+            continue
+        j = i
+        while j < last and not speech[j]:
+            j += 1
+        if j - i > gap_frames:
+            # 무음 앞뒤로 간격의 절반씩 남김
+            half = gap_frames // 2
+            ranges.append((range_start, i + half))
+            range_start = j - (gap_frames - half)
+        i = j
+    ranges.append((range_start, min(frame_count, last + edge_frames)))
+
+    compact = bytearray()
+    for range_first, range_last in ranges:
+        range_begin = start + range_first * frame_size
+        range_end = min(start + range_last * frame_size, end)
+        offset_map.add(range_begin, range_end - range_begin)
+        compact += wavData[range_begin:range_end]
+    return compact, offset_map
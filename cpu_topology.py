@@ -0,0 +1,144 @@
+import glob
+import os
+import re
+
+def available_cpus():
+    """
+    현재 프로세스가 사용할 수 있는 CPU 번호 리스트 반환
+
+    Returns
+    -------
+    list
+        정렬된 CPU 번호 리스트
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def parse_cpulist(text):
+    """
+    리눅스 cpulist 형식 문자열 파싱
+
+    Parameters
+    ----------
+    text : str
+        cpulist 문자열 (예: '0-3,8-11')
+    """
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+def numa_nodes(cpus=None):
+    """
+    NUMA 노드별 CPU 번호 반환
+
+    NUMA 정보가 없는 경우 모든 CPU를 노드 0으로 취급
+
+    Parameters
+    ----------
+    cpus : list, optional
+        사용할 CPU 번호 리스트. None인 경우 available_cpus()
+
+    Returns
+    -------
+    dict
+        {노드 번호: CPU 번호 리스트}
+    """
+    cpus = available_cpus() if cpus is None else cpus
+    allowed = set(cpus)
+    nodes = {}
+    for path in glob.glob('/sys/devices/system/node/node[0-9]*/cpulist'):
+        node = int(re.search(r'node(\d+)', path).group(1))
+        with open(path) as f:
+            node_cpus = [cpu for cpu in parse_cpulist(f.read()) if cpu in allowed]
+        if node_cpus:
+            nodes[node] = node_cpus
+    return nodes or {0: list(cpus)}
+
+class CpuPlanner:
+    """엔진별 스레드 수와 CPU 고정 위치를 계산하는 클래스"""
+
+    def __init__(self, engine_count, threads_per_engine=0, num_workers=1, pin=False, cpus=None):
+        """
+        CPU 배치 계획 초기화
+
+        Parameters
+        ----------
+        engine_count : int
+            동시에 실행할 엔진 수
+        threads_per_engine : int
+            엔진당 연산 스레드 수. 0인 경우 코어 수 / 엔진 수
+        num_workers : int
+            엔진당 CTranslate2 worker 수
+        pin : bool
+            엔진 프로세스를 CPU 집합에 고정할지 여부
+        cpus : list, optional
+            사용할 CPU 번호 리스트. None인 경우 available_cpus()
+        """
+        self.cpus = available_cpus() if cpus is None else cpus
+        self.threads = threads_per_engine or max(1, len(self.cpus) // max(engine_count, 1))
+        self.num_workers = num_workers
+        self.pin = pin
+        self.slots = self.plan_slots()
+        self.assigned = {}
+
+    def plan_slots(self):
+        """
+        엔진 하나가 사용할 CPU 집합(slot) 리스트 계산
+
+        가능하면 한 slot이 하나의 NUMA 노드 안에 있도록 나누고,
+        연속된 엔진이 여러 노드에 번갈아 배치되도록 정렬
+        """
+        nodes = numa_nodes(self.cpus)
+        if any(len(node_cpus) < self.threads for node_cpus in nodes.values()):
+            nodes = {0: self.cpus}
+
+        per_node = []
+        for node_cpus in nodes.values():
+            chunks = [node_cpus[i:i + self.threads]
+                      for i in range(0, len(node_cpus) - self.threads + 1, self.threads)]
+            per_node.append(chunks)
+
+        slots = []
+        for i in range(max(len(chunks) for chunks in per_node)):
+            for chunks in per_node:
+                if i < len(chunks):
+                    slots.append(chunks[i])
+        return slots or [self.cpus]
+
+    def assign(self, engine_name):
+        """
+        엔진에 CPU 집합 할당
+
+        같은 이름의 엔진(재시작, 교체)은 같은 CPU 집합을 사용
+
+        Returns
+        -------
+        list or None
+            고정할 CPU 번호 리스트. pin이 꺼져 있으면 None
+        """
+        if not self.pin:
+            return None
+        if engine_name not in self.assigned:
+            used = list(self.assigned.values())
+            slot = min(range(len(self.slots)), key=lambda i: used.count(i))
+            self.assigned[engine_name] = slot
+        return self.slots[self.assigned[engine_name]]
+
+    def release(self, engine_name):
+        """
+        제거된 엔진의 CPU 집합 반환
+
+        자동 확장으로 추가되는 엔진은 매번 새 이름을 사용하므로, 제거 시 반환하지 않으면
+        사용하지 않는 CPU 집합이 계속 사용 중으로 계산됨
+        """
+        self.assigned.pop(engine_name, None)
+
+    def summary(self):
+        """배치 계획 요약 문자열"""
+        return (f'cpus[{len(self.cpus)}] threads_per_engine[{self.threads}] '
+                f'num_workers[{self.num_workers}] pin[{self.pin}] slots[{len(self.slots)}]')
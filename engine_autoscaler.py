@@ -0,0 +1,112 @@
+import threading
+from time import time
+
+class EngineAutoscaler(threading.Thread):
+    """엔진 사용률과 할당 대기 시간에 따라 풀별 엔진 수를 조절하는 스레드"""
+
+    def __init__(self, pool_manager, supervisor, process_logger, enabled=False, interval=5.0,
+                 max_channel=1, scale_up_occupancy=0.8, scale_up_wait=1.0,
+                 idle_cooldown=300.0, memory_ceiling_mb=0):
+        """
+        자동 확장 스레드 초기화
+
+        Parameters
+        ----------
+        pool_manager : PoolManager
+            엔진 풀 관리자
+        supervisor : EngineSupervisor
+            엔진 추가/제거를 담당하는 감시 스레드
+        process_logger : logging.Logger
+            로거
+        enabled : bool
+            자동 확장 사용 여부
+        interval : float
+            판단 주기 (초)
+        max_channel : int
+            풀별 최대 엔진 수 기본값 (풀 설정의 max_channel이 우선)
+        scale_up_occupancy : float
+            사용 중인 엔진 비율이 이 값 이상이면 엔진 추가
+        scale_up_wait : float
+            최근 평균 할당 대기 시간(초)이 이 값 이상이면 엔진 추가
+        idle_cooldown : float
+            이 시간(초) 동안 사용되지 않은 엔진은 제거 대상
+        memory_ceiling_mb : int
+            전체 엔진 모델 메모리 상한 (MB). 0인 경우 제한 없음
+        """
+        super().__init__(daemon=True)
+        self.pools = pool_manager
+        self.supervisor = supervisor
+        self.logger = process_logger
+        self.configure(enabled, interval, max_channel, scale_up_occupancy, scale_up_wait,
+                       idle_cooldown, memory_ceiling_mb)
+        self.stop_event = threading.Event()
+
+    def configure(self, enabled=False, interval=5.0, max_channel=1, scale_up_occupancy=0.8,
+                  scale_up_wait=1.0, idle_cooldown=300.0, memory_ceiling_mb=0):
+        """자동 확장 설정 적용 (설정 다시 읽기 시에도 사용)"""
+        self.enabled = enabled
+        self.interval = interval
+        self.max_channel = max_channel
+        self.scale_up_occupancy = scale_up_occupancy
+        self.scale_up_wait = scale_up_wait
+        self.idle_cooldown = idle_cooldown
+        self.memory_ceiling_mb = memory_ceiling_mb
+
+    def run(self):
+        """주기적으로 풀별 확장/축소 판단"""
+        while not self.stop_event.wait(self.interval):
+            if not self.enabled:
+                continue
+            for pool in list(self.pools.pools.values()):
+                try:
+                    self.scale_pool(pool)
+                except Exception as e:
+                    self.logger.exception(f'풀[{pool.name}] 자동 확장 실패 - {e.__class__.__name__}:{e}')
+
+    def engine_memory(self):
+        """전체 엔진이 모델을 로드했을 때의 예상 메모리 총량 (MB)"""
+        return sum(self.pools.pools[engine['pool']].memory_mb
+                   for engine in self.pools.engine_list if engine['pool'] in self.pools.pools)
+
+    def scale_pool(self, pool):
+        """
+        풀 하나의 엔진 수 조절
+
+        ENGINE_LIST의 사용 중(running) 엔진 비율, 대기 중인 요청 수, 최근 할당 대기 시간으로
+        추가를 판단하고, idle_cooldown 동안 쓰이지 않은 유휴 엔진을 하나씩 제거
+        """
+        engines = self.pools.pool_engines(pool)
+        if any(engine['state'] == 'starting' for engine in engines):
+            return
+
+        active = [engine for engine in engines if engine['state'] == 'ready']
+        running = sum(engine['running'] for engine in active)
+        occupancy = running / len(active) if active else 1.0
+        average_wait = pool.average_wait()
+
+        busy = (occupancy >= self.scale_up_occupancy or pool.waiting > 0
+                or average_wait >= self.scale_up_wait)
+        if busy and len(engines) < pool.max_channel:
+            if 0 < self.memory_ceiling_mb < self.engine_memory() + pool.memory_mb:
+                self.logger.warning(f'풀[{pool.name}] 엔진 추가 불가 : memory_ceiling_mb[{self.memory_ceiling_mb}]')
+                return
+            self.logger.info(f'풀[{pool.name}] 엔진 추가 : occupancy[{occupancy:.2f}] '
+                             f'waiting[{pool.waiting}] average_wait[{average_wait:.2f}s]')
+            pool.wait_times.clear()
+            self.supervisor.add_engine(pool)
+            return
+
+        if busy or len(engines) <= pool.channel:
+            return
+        if running / max(len(active) - 1, 1) >= self.scale_up_occupancy:
+            # 하나를 제거하면 곧바로 다시 추가 조건이 되는 경우
+            return
+        now = time()
+        idle = [engine for engine in active
+                if not engine['running'] and now - engine['last_used'] > self.idle_cooldown]
+        for engine in sorted(idle, key=lambda e: e['last_used']):
+            if self.pools.try_drain(engine):
+                self.logger.info(f"풀[{pool.name}] 엔진 제거 : Engine[{engine['process'].engine_name}] "
+                                 f"idle[{now - engine['last_used']:.0f}s]")
+                self.supervisor.retire_engine(engine)
+                return
@@ -0,0 +1,393 @@
+import threading
+from collections import deque
+from time import time
+
+# faster-whisper int8 모델의 대략적인 메모리 사용량 (MB)
+MODEL_MEMORY_MB = {
+    'tiny': 150,
+    'base': 250,
+    'small': 600,
+    'medium': 1500,
+    'large-v1': 3000,
+    'large-v2': 3000,
+    'large-v3': 3000,
+}
+DEFAULT_MODEL_MEMORY_MB = 1000
+
+def estimate_model_memory(model_size):
+    """
+    모델 크기별 예상 메모리 사용량 반환
+
+    Parameters
+    ----------
+    model_size : str
+        모델 크기 (tiny, base, small, ...)
+
+    Returns
+    -------
+    int
+        예상 메모리 사용량 (MB)
+    """
+    return MODEL_MEMORY_MB.get(model_size, DEFAULT_MODEL_MEMORY_MB)
+
+class EnginePool:
+    """같은 모델/언어를 사용하는 엔진 묶음"""
+
+    def __init__(self, name, config, channel, memory_mb=None, max_channel=None):
+        """
+        엔진 풀 초기화
+
+        Parameters
+        ----------
+        name : str
+            풀 이름 (엔진 이름의 접두어로 사용)
+        config : ASRConfig
+            풀에 속한 엔진들이 사용할 ASR 설정
+        channel : int
+            풀의 엔진 수 (자동 확장 시 최소 엔진 수)
+        memory_mb : int, optional
+            엔진 하나가 모델 로드 시 사용하는 메모리 (MB). None인 경우 모델 크기로 추정
+        max_channel : int, optional
+            자동 확장 시 최대 엔진 수. None인 경우 channel
+        """
+        self.name = name
+        self.config = config
+        self.channel = channel
+        self.max_channel = max(max_channel or channel, channel)
+        self.memory_mb = memory_mb or estimate_model_memory(config.model_size)
+        self.next_index = 0
+        
+        # 할당 대기 요청 (qos.Ticket) 및 대기 통계 (자동 확장 판단용)
+        self.waiters = []
+        self.wait_times = deque(maxlen=50)
+
+    @property
+    def waiting(self):
+        """할당 대기 중인 요청 수"""
+        return len(self.waiters)
+
+    def average_wait(self, window=60.0):
+        """최근 window초 동안의 할당 대기 시간 평균 (초)"""
+        since = time() - window
+        waits = [wait for at, wait in self.wait_times if at >= since]
+        if not waits:
+            return 0.0
+        return sum(waits) / len(waits)
+
+    def next_engine_name(self):
+        """풀 안에서 겹치지 않는 엔진 이름 생성"""
+        name = f'{self.name}:{self.next_index}'
+        self.next_index += 1
+        return name
+
+    @property
+    def model_size(self):
+        return self.config.model_size
+
+    @property
+    def language(self):
+        return self.config.language
+
+    def matches(self, language=None, model_size=None):
+        """요청된 언어/모델과 일치하는지 확인"""
+        if language and language != self.language:
+            return False
+        if model_size and model_size != self.model_size:
+            return False
+        return True
+
+    def serves(self, config):
+        """
+        엔진 설정의 모델/언어가 풀과 같은지 확인
+
+        설정 변경으로 엔진을 하나씩 교체하는 동안에는 풀 설정과 다른 모델의 엔진이 섞여 있음
+        """
+        return config.language == self.language and config.model_size == self.model_size
+
+class PoolManager:
+    """엔진 풀 관리 및 메모리 한도 내 모델 LRU 교체를 담당하는 클래스"""
+
+    def __init__(self, engine_list, process_logger, memory_budget_mb=0, aging=0.0):
+        """
+        풀 관리자 초기화
+
+        Parameters
+        ----------
+        engine_list : list
+            전체 엔진 정보 리스트 (ENGINE_LIST)
+        process_logger : logging.Logger
+            로거
+        memory_budget_mb : int
+            동시에 로드 가능한 모델 메모리 총량 (MB). 0인 경우 제한 없음
+        aging : float
+            할당 대기 시간이 aging초 늘 때마다 우선순위를 한 단계 올림 (0인 경우 사용 안 함)
+        """
+        self.engine_list = engine_list
+        self.logger = process_logger
+        self.memory_budget_mb = memory_budget_mb
+        self.aging = aging
+        self.pools = {}
+        self.default_pool = None
+        self.reserved_mb = 0  # 엔진 목록 밖에서 로드 중인 모델 메모리 (교체용 엔진)
+        self.lock = threading.RLock()
+        self.available = threading.Condition(self.lock)
+
+    def add_pool(self, pool, default=False):
+        """풀 등록"""
+        self.pools[pool.name] = pool
+        if default or self.default_pool is None:
+            self.default_pool = pool
+
+    def remove_pool(self, pool):
+        """풀 등록 해제 (엔진은 먼저 제거되어 있어야 함)"""
+        del self.pools[pool.name]
+        if self.default_pool is pool:
+            self.default_pool = next(iter(self.pools.values()), None)
+
+    def add_engine(self, pool, process, loaded=False):
+        """
+        풀에 엔진 등록
+
+        Parameters
+        ----------
+        pool : EnginePool
+            엔진이 속할 풀
+        process : ASRProcess
+            엔진 프로세스
+        loaded : bool
+            시작 시 모델을 미리 로드하는지 여부
+
+        Returns
+        -------
+        dict
+            등록된 엔진 정보
+        """
+        engine = {
+            'running': False,
+            'state': 'starting',
+            'process': process,
+            'pool': pool.name,
+            'loaded': loaded,
+            'loading': False,
+            'last_used': time(),
+        }
+        with self.lock:
+            self.engine_list.append(engine)
+        return engine
+
+    def find_pool(self, language=None, model_size=None):
+        """
+        요청된 언어/모델에 맞는 풀 검색
+
+        Returns
+        -------
+        EnginePool or None
+            조건에 맞는 풀. 조건이 없으면 기본 풀
+        """
+        if not language and not model_size:
+            return self.default_pool
+        if self.default_pool is not None and self.default_pool.matches(language, model_size):
+            return self.default_pool
+        for pool in self.pools.values():
+            if pool.matches(language, model_size):
+                return pool
+        return None
+
+    def pool_engines(self, pool):
+        """풀에 속한 엔진 리스트 반환"""
+        return [engine for engine in self.engine_list if engine['pool'] == pool.name]
+
+    def loaded_memory(self):
+        """현재 로드된(로드 중 포함) 모델들과 확보해 둔 메모리의 예상 총량 (MB)"""
+        return self.reserved_mb + sum(self.pools[engine['pool']].memory_mb
+                                      for engine in self.engine_list
+                                      if engine['loaded'] or engine['loading'])
+
+    def reserve(self, memory_mb, timeout):
+        """
+        엔진 목록 밖에서 로드할 모델(설정 변경 시 교체용 엔진)의 메모리 확보
+
+        필요하면 LRU 순서로 유휴 엔진의 모델을 해제하며 해제 완료를 기다림
+
+        Parameters
+        ----------
+        memory_mb : int
+            확보할 메모리 (MB)
+        timeout : float
+            최대 대기 시간 (초)
+
+        Returns
+        -------
+        bool
+            확보 여부. 확보한 메모리는 unreserve로 반환해야 함
+        """
+        deadline = time() + timeout
+        with self.available:
+            while not self._make_room(memory_mb):
+                remaining = deadline - time()
+                if remaining <= 0:
+                    return False
+                self.available.wait(min(remaining, 1.0))
+            self.reserved_mb += memory_mb
+            return True
+
+    def unreserve(self, memory_mb):
+        """reserve로 확보한 메모리 반환"""
+        with self.available:
+            self.reserved_mb -= memory_mb
+            self.available.notify_all()
+
+    def try_allocate(self, pool):
+        """
+        풀에서 유휴 엔진 할당 시도
+
+        모델이 이미 로드된 엔진을 우선 할당하고, 없으면 메모리 한도를 확인한 뒤
+        필요 시 가장 오래 사용되지 않은 유휴 엔진의 모델을 내려 공간을 확보
+
+        Parameters
+        ----------
+        pool : EnginePool
+            할당할 풀
+
+        Returns
+        -------
+        dict or None
+            할당된 엔진 정보. 유휴 엔진이 없거나 메모리가 부족하면 None
+        """
+        with self.lock:
+            # 요청은 풀 설정의 모델로 받았으므로 같은 모델을 실행 중인 엔진만 할당
+            idle = [engine for engine in self.pool_engines(pool)
+                    if engine['state'] == 'ready' and not engine['running']
+                    and pool.serves(engine['process'].config)]
+            if not idle:
+                return None
+
+            warm = [engine for engine in idle if engine['loaded']]
+            if warm:
+                engine = max(warm, key=lambda e: e['last_used'])
+            else:
+                if not self._make_room(pool.memory_mb):
+                    return None
+                engine = idle[0]
+
+            engine['running'] = True
+            if not engine['loaded']:
+                # 엔진이 모델 로드를 알릴 때(EngineSupervisor.on_loaded)까지 로드 예정으로 계산
+                engine['loading'] = True
+            engine['last_used'] = time()
+            return engine
+
+    def allocate(self, pool, timeout, ticket):
+        """
+        유휴 엔진이 생길 때까지 대기하며 할당
+
+        대기 요청은 우선순위, 마감 시간, 도착 순서로 정렬하여 가장 앞선 요청부터 할당.
+        오래 기다린 요청은 aging에 따라 우선순위가 올라가므로 낮은 등급도 결국 할당됨
+
+        Parameters
+        ----------
+        pool : EnginePool
+            할당할 풀
+        timeout : float
+            최대 대기 시간 (초)
+        ticket : qos.Ticket
+            할당 요청 (우선순위 등급, 도착 시간, 마감 시간)
+
+        Returns
+        -------
+        dict or None
+            할당된 엔진 정보. 시간 내에 할당하지 못하면 None
+        """
+        engine = None
+        with self.available:
+            pool.waiters.append(ticket)
+            try:
+                while True:
+                    if self.next_waiter(pool) is ticket:
+                        engine = self.try_allocate(pool)
+                    remaining = timeout - (time() - ticket.arrival)
+                    if engine is not None or remaining <= 0:
+                        break
+                    # 엔진 반환 시 깨어나며, 상태 변경(ready 등)과 aging을 위해 주기적으로 재확인
+                    self.available.wait(min(remaining, 1.0))
+            finally:
+                pool.waiters.remove(ticket)
+                # 다음 순서의 요청이 이어서 할당을 시도하도록 깨움
+                self.available.notify_all()
+        pool.wait_times.append((time(), time() - ticket.arrival))
+        return engine
+
+    def next_waiter(self, pool):
+        """풀에서 다음에 할당받을 대기 요청"""
+        now = time()
+        return min(pool.waiters, key=lambda ticket: ticket.rank(now, self.aging))
+
+    def release(self, engine, started=False):
+        """
+        엔진 반환
+
+        Parameters
+        ----------
+        engine : dict
+            반환할 엔진 정보
+        started : bool
+            엔진에 세션 시작(%b)을 전달했는지 여부. 전달하지 않았으면 엔진이 모델을 로드하지
+            않으므로 할당 시 로드 예정으로 계산한 메모리 반환
+        """
+        with self.available:
+            engine['last_used'] = time()
+            engine['running'] = False
+            if not started:
+                engine['loading'] = False
+            self.available.notify_all()
+
+    def try_drain(self, engine):
+        """
+        유휴 엔진을 할당 대상에서 제외
+
+        Returns
+        -------
+        bool
+            엔진이 유휴 상태여서 제외했는지 여부
+        """
+        with self.lock:
+            if engine['running'] or engine['state'] != 'ready':
+                return False
+            engine['state'] = 'draining'
+            return True
+
+    def _make_room(self, needed_mb):
+        """
+        메모리 한도를 넘지 않도록 LRU 순서로 유휴 엔진의 모델 해제 요청
+
+        해제 요청한 엔진은 'unloading' 상태로 할당 대상에서 제외하고, 엔진이 제어 채널로
+        해제를 알려야(EngineSupervisor.on_unloaded) 로드된 메모리에서 제외.
+        해제 요청은 EngineSupervisor가 제어 채널로 전달
+
+        lock을 잡은 상태에서 호출해야 함
+
+        Returns
+        -------
+        bool
+            필요한 메모리를 확보했는지 여부. 해제 완료를 기다리는 중이면 False
+        """
+        if self.memory_budget_mb <= 0:
+            return True
+
+        used = self.loaded_memory()
+        unloading = sum(self.pools[engine['pool']].memory_mb
+                        for engine in self.engine_list if engine['state'] == 'unloading')
+        candidates = sorted(
+            (engine for engine in self.engine_list
+             if engine['loaded'] and engine['state'] == 'ready' and not engine['running']),
+            key=lambda e: e['last_used'])
+
+        while used - unloading + needed_mb > self.memory_budget_mb:
+            if not candidates:
+                return False
+            victim = candidates.pop(0)
+            victim['state'] = 'unloading'
+            victim['unload'] = True
+            unloading += self.pools[victim['pool']].memory_mb
+            self.logger.info(f"Engine[{victim['process'].engine_name}] : 모델 해제 요청 (LRU)")
+        return used + needed_mb <= self.memory_budget_mb
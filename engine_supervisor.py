@@ -0,0 +1,349 @@
+import queue
+import threading
+from time import sleep, time
+
+MAX_RESTART_DELAY = 60.0
+
+class EngineSupervisor(threading.Thread):
+    """엔진 프로세스 상태 감시, 장애 시 재시작 및 종료 처리를 담당하는 스레드"""
+
+    def __init__(self, pool_manager, process_logger, create_process, release_process=None,
+                 heartbeat_interval=1.0, heartbeat_timeout=10.0,
+                 restart_delay=1.0, drain_timeout=30.0, ready_timeout=600.0):
+        """
+        감시 스레드 초기화
+
+        Parameters
+        ----------
+        pool_manager : PoolManager
+            엔진 풀 관리자
+        process_logger : logging.Logger
+            로거
+        create_process : callable
+            create_process(engine_name, config, preload) -> ASRProcess
+        release_process : callable, optional
+            release_process(engine_name). 엔진 제거/교체 시 엔진 이름에 할당된 자원(CPU 집합) 반환
+        heartbeat_interval : float
+            heartbeat 전송 주기 (초)
+        heartbeat_timeout : float
+            응답이 없을 때 엔진을 멈춘 것으로 판단하는 시간 (초)
+        restart_delay : float
+            재시작 대기 시간 (초). 연속 실패 시 두 배씩 증가
+        drain_timeout : float
+            종료 시 진행 중인 세션을 기다리는 최대 시간 (초)
+        ready_timeout : float
+            교체용 엔진의 모델 로드를 기다리는 최대 시간 (초)
+        """
+        super().__init__(daemon=True)
+        self.pools = pool_manager
+        self.logger = process_logger
+        self.create_process = create_process
+        self.release_process = release_process
+        self.configure(heartbeat_interval, heartbeat_timeout, restart_delay, drain_timeout, ready_timeout)
+        self.stop_event = threading.Event()
+        self.lock = threading.RLock()
+        self.seq = 0
+
+    def configure(self, heartbeat_interval=1.0, heartbeat_timeout=10.0,
+                  restart_delay=1.0, drain_timeout=30.0, ready_timeout=600.0):
+        """감시 설정 적용 (설정 다시 읽기 시에도 사용)"""
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_delay = restart_delay
+        self.drain_timeout = drain_timeout
+        self.ready_timeout = ready_timeout
+
+    def start_engines(self):
+        """등록된 모든 엔진 프로세스 시작"""
+        for engine in list(self.pools.engine_list):
+            self.start_engine(engine)
+
+    def start_engine(self, engine):
+        """엔진 프로세스 시작 및 감시 정보 초기화"""
+        engine['state'] = 'starting'
+        engine['heartbeat'] = time()
+        engine.setdefault('restarts', 0)
+        engine['restart_at'] = 0.0
+        engine['process'].start()
+
+    def run(self):
+        """heartbeat 전송 및 장애 엔진 감지"""
+        while not self.stop_event.wait(self.heartbeat_interval):
+            self.seq += 1
+            for engine in list(self.pools.engine_list):
+                try:
+                    with self.lock:
+                        self.check_engine(engine)
+                except Exception as e:
+                    self.logger.exception(f"Engine[{engine['process'].engine_name}] : "
+                                          f"{e.__class__.__name__}:{e}")
+
+    def check_engine(self, engine):
+        """엔진 하나의 상태 확인 후 필요 시 재시작"""
+        process = engine['process']
+        now = time()
+
+        if engine['state'] == 'failed':
+            if now >= engine['restart_at']:
+                self.restart_engine(engine)
+            return
+
+        self.poll_control(engine)
+
+        if not process.is_alive():
+            self.fail_engine(engine, f'exitcode[{process.exitcode}]')
+        elif now - engine['heartbeat'] > self.heartbeat_timeout:
+            self.fail_engine(engine, f'heartbeat timeout[{now - engine["heartbeat"]:.1f}s]')
+        else:
+            try:
+                self.send_control(engine, ('ping', self.seq))
+                if engine.pop('unload', False):
+                    # PoolManager가 요청한 모델 해제 (LRU 교체)
+                    self.send_control(engine, ('unload',))
+            except (BrokenPipeError, OSError) as e:
+                self.fail_engine(engine, f'{e.__class__.__name__}:{e}')
+
+    def send_control(self, engine, message):
+        """엔진 제어 채널로 메시지 전송"""
+        with self.lock:
+            engine['process'].control_parent.send(message)
+
+    def poll_control(self, engine):
+        """엔진이 제어 채널로 보낸 메시지 처리"""
+        process = engine['process']
+        try:
+            while process.control_parent.poll():
+                message = process.control_parent.recv()
+                engine['heartbeat'] = time()
+                if message[0] == 'ready':
+                    self.on_ready(engine, message)
+                elif message[0] == 'loaded':
+                    self.on_loaded(engine)
+                elif message[0] == 'unloaded':
+                    self.on_unloaded(engine)
+        except (EOFError, OSError):
+            pass
+
+    def on_ready(self, engine, message):
+        """엔진 준비 완료 처리"""
+        with self.pools.available:
+            engine['state'] = 'ready'
+            engine['loaded'] = message[1]
+            self.pools.available.notify_all()
+        engine['restarts'] = 0
+        timings = ' '.join(f'{key}[{value:.2f}s]' for key, value in message[2].items())
+        self.logger.info(f"Engine[{engine['process'].engine_name}] : ready (model_loaded[{message[1]}]) "
+                         f"{timings}")
+
+    def on_loaded(self, engine):
+        """엔진의 모델 로드(lazy_load 엔진의 첫 세션) 완료 처리"""
+        with self.pools.lock:
+            engine['loaded'] = True
+            engine['loading'] = False
+
+    def on_unloaded(self, engine):
+        """엔진의 모델 해제 완료 처리 (해제 요청한 엔진을 다시 할당 대상에 포함)"""
+        with self.pools.available:
+            engine['loaded'] = False
+            if engine['state'] == 'unloading':
+                engine['state'] = 'ready'
+            self.pools.available.notify_all()
+        self.logger.info(f"Engine[{engine['process'].engine_name}] : 모델 해제 완료")
+
+    def fail_engine(self, engine, reason):
+        """
+        장애 엔진 정리
+
+        프로세스를 강제 종료하고 진행 중인 세션에 %F를 전달한 뒤 재시작 예약
+        """
+        process = engine['process']
+        self.logger.error(f'Engine[{process.engine_name}] : ENGINE_FAILURE : {reason}')
+        with self.pools.lock:
+            engine['state'] = 'failed'
+        if process.is_alive():
+            process.kill()
+        process.join(5)
+        # 읽는 쪽이 없어진 입력 큐 때문에 서버 종료 시 대기하지 않도록 설정
+        process.data_in.cancel_join_thread()
+
+        if engine['running']:
+            self.fail_session(process, 'ENGINE_FAILURE')
+
+        delay = min(self.restart_delay * (2 ** engine['restarts']), MAX_RESTART_DELAY)
+        engine['restarts'] += 1
+        engine['restart_at'] = time() + delay
+
+    def restart_engine(self, engine):
+        """같은 이름과 설정으로 새 엔진 프로세스를 만들어 교체"""
+        old = engine['process']
+        new = self.create_process(old.engine_name, old.config, engine['loaded'])
+        with self.pools.lock:
+            engine['process'] = new
+            engine['loaded'] = False
+            engine['loading'] = False
+            engine.pop('unload', None)
+        self.logger.info(f"Engine[{old.engine_name}] : 재시작 (restarts[{engine['restarts']}])")
+        self.start_engine(engine)
+
+    def add_engine(self, pool):
+        """풀에 엔진을 새로 추가하고 시작"""
+        process = self.create_process(pool.next_engine_name(), pool.config)
+        engine = self.pools.add_engine(pool, process, loaded=process.preload)
+        with self.lock:
+            self.start_engine(engine)
+        self.logger.info(f'Engine[{process.engine_name}] : 추가')
+        return engine
+
+    def wait_ready(self, process):
+        """
+        시작한 엔진이 ready를 보낼 때까지 대기
+
+        Returns
+        -------
+        tuple or None
+            ready 메시지. 시간 초과 또는 프로세스 종료 시 None
+        """
+        deadline = time() + self.ready_timeout
+        while time() < deadline and process.is_alive():
+            if process.control_parent.poll(0.5):
+                message = process.control_parent.recv()
+                if message[0] == 'ready':
+                    return message
+        return None
+
+    def drain_engine(self, engine):
+        """
+        엔진을 할당 대상에서 제외하고 진행 중인 세션이 끝날 때까지 대기
+
+        drain_timeout 안에 끝나지 않으면 엔진 장애로 처리하여 세션을 %F로 종료
+        """
+        with self.pools.lock:
+            engine['state'] = 'draining'
+        deadline = time() + self.drain_timeout
+        while engine['running'] or engine['state'] != 'draining':
+            if time() >= deadline:
+                with self.lock:
+                    if engine['state'] != 'failed':
+                        self.fail_engine(engine, f'drain timeout[{self.drain_timeout}s]')
+                return
+            if engine['state'] == 'ready':
+                # 장애로 재시작된 경우 다시 할당 대상에서 제외
+                with self.pools.lock:
+                    engine['state'] = 'draining'
+            sleep(0.5)
+
+    def stop_process(self, process):
+        """엔진 프로세스에 종료 요청 후 대기, 응답이 없으면 강제 종료"""
+        try:
+            process.data_in.put((b'%q', None), timeout=1)
+        except Exception:
+            pass
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+            process.join(1)
+
+    def replace_engine(self, engine, config, memory_mb):
+        """
+        새 설정의 엔진으로 무중단 교체
+
+        새 엔진을 먼저 띄워 모델 로드와 warm-up이 끝나면, 기존 엔진의 세션이
+        끝나기를 기다렸다가 교체. 풀이 모델을 미리 로드하는 경우 교체 중에는 모델이
+        두 벌 로드되므로 새 모델 메모리를 memory_budget_mb 안에서 먼저 확보하고,
+        확보하지 못하면 새 엔진은 첫 세션에서 모델 로드
+
+        Parameters
+        ----------
+        engine : dict
+            교체할 엔진 정보
+        config : ASRConfig
+            새 설정
+        memory_mb : int
+            새 설정의 모델 메모리 (MB)
+
+        Returns
+        -------
+        bool
+            교체 성공 여부
+        """
+        name = engine['process'].engine_name
+        preload = not config.lazy_load
+        if preload and not self.pools.reserve(memory_mb, self.drain_timeout):
+            self.logger.warning(f'Engine[{name}] : 메모리 한도로 교체 엔진은 첫 세션에서 모델 로드')
+            preload = False
+        reserved = memory_mb if preload else 0
+
+        try:
+            # 교체 엔진은 현재 사용량 기준으로 CPU 집합을 다시 할당
+            if self.release_process is not None:
+                self.release_process(name)
+            new = self.create_process(name, config, preload)
+            new.start()
+            message = self.wait_ready(new)
+            if message is None:
+                self.logger.error(f'Engine[{name}] : 교체 엔진 준비 실패, 기존 엔진 유지')
+                self.stop_process(new)
+                return False
+
+            self.drain_engine(engine)
+            with self.lock, self.pools.lock:
+                old = engine['process']
+                engine['process'] = new
+                engine['state'] = 'ready'
+                engine['loaded'] = message[1]
+                engine['loading'] = False
+                engine['heartbeat'] = time()
+                engine['restarts'] = 0
+                engine.pop('unload', None)
+            self.stop_process(old)
+        finally:
+            # 기존 엔진 종료 후에는 새 모델이 엔진 목록의 메모리로 계산됨
+            if reserved:
+                self.pools.unreserve(reserved)
+        self.logger.info(f'Engine[{name}] : 교체 완료 ({config.model_size}, {config.language})')
+        return True
+
+    def retire_engine(self, engine):
+        """진행 중인 세션이 끝나면 엔진을 풀에서 제거하고 종료"""
+        self.drain_engine(engine)
+        with self.lock, self.pools.lock:
+            self.pools.engine_list.remove(engine)
+        self.stop_process(engine['process'])
+        if self.release_process is not None:
+            self.release_process(engine['process'].engine_name)
+        self.logger.info(f"Engine[{engine['process'].engine_name}] : 제거")
+
+    def fail_session(self, process, reason):
+        """엔진 결과 큐에 %F를 넣어 진행 중인 세션을 종료"""
+        while True:
+            try:
+                process.data_out.put_nowait(('%F', reason))
+                process.notify_result()
+                return
+            except queue.Full:
+                try:
+                    process.data_out.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def shutdown(self):
+        """
+        진행 중인 세션이 끝나기를 기다린 후 모든 엔진 종료
+
+        drain_timeout 안에 끝나지 않은 세션은 %F로 종료
+        """
+        self.stop_event.set()
+        self.logger.info(f'엔진 종료 시작 (drain_timeout[{self.drain_timeout}s])')
+
+        deadline = time() + self.drain_timeout
+        while time() < deadline and any(engine['running'] for engine in self.pools.engine_list):
+            sleep(0.5)
+
+        for engine in list(self.pools.engine_list):
+            if engine['running']:
+                self.fail_session(engine['process'], 'SERVER_SHUTDOWN')
+        sleep(1)
+
+        for engine in list(self.pools.engine_list):
+            self.stop_process(engine['process'])
+        self.logger.info('엔진 종료 완료')
@@ -73,6 +73,26 @@ class Log:
         # file_handler.setFormatter(formatter)
         # self.logger.addHandler(file_handler)
 
+    def get_log_dir(self, file_path, name):
+        """
+        로그 파일 폴더 아래의 하위 폴더 경로 반환 (없으면 생성)
+        
+        Parameters
+        ----------
+        file_path : str
+            config_log에 전달한 로그 파일 경로
+        name : str
+            하위 폴더 이름
+            
+        Returns
+        -------
+        str
+            하위 폴더 경로
+        """
+        log_dir = os.path.join(os.path.dirname(file_path), name)
+        os.makedirs(log_dir, exist_ok=True)
+        return log_dir
+
     def listener_end(self, queue):
         """
         로그 리스너 스레드 종료
@@ -83,7 +103,7 @@ class Log:
             종료할 로그 메시지 큐
         """
         queue.put(None)  # 종료 신호 전송
-        self.logger.handlers.clear()  # 로거 핸들러 초기화
+        self.logger.join()  # 남은 로그 처리 대기
 
     def _proc_log_queue(self, file_path, level, name, queue):
         """
@@ -0,0 +1,119 @@
+import cProfile
+import io
+import os
+import pstats
+from time import perf_counter
+
+from util import get_today
+
+PROFILE_MODES = ('timing', 'cprofile')
+
+class StageTimer:
+    """세션 처리 단계별 호출 수와 소요 시간 기록"""
+
+    def __init__(self):
+        """단계별 기록 초기화 ({단계: [호출 수, 합계, 최대]})"""
+        self.stages = {}
+
+    def add(self, stage, started):
+        """
+        단계 하나의 소요 시간 기록
+
+        Parameters
+        ----------
+        stage : str
+            단계 이름 (vad, resample, decode, emit)
+        started : float
+            단계 시작 시각 (perf_counter)
+
+        Returns
+        -------
+        float
+            현재 시각 (다음 단계의 시작 시각으로 사용)
+        """
+        now = perf_counter()
+        elapsed = now - started
+        record = self.stages.setdefault(stage, [0, 0.0, 0.0])
+        record[0] += 1
+        record[1] += elapsed
+        record[2] = max(record[2], elapsed)
+        return now
+
+    def summary(self):
+        """단계별 통계 문자열"""
+        lines = [f"{'stage':<10} {'calls':>8} {'total(s)':>10} {'avg(ms)':>10} {'max(ms)':>10}"]
+        for stage, (calls, total, longest) in self.stages.items():
+            lines.append(f'{stage:<10} {calls:>8} {total:>10.3f} '
+                         f'{total / calls * 1000:>10.2f} {longest * 1000:>10.2f}')
+        return '\n'.join(lines)
+
+class SessionProfiler:
+    """세션 하나의 단계별 시간과 (선택 시) cProfile 결과를 파일로 저장"""
+
+    def __init__(self, mode, output_dir, engine_name, username):
+        """
+        세션 프로파일러 초기화
+
+        Parameters
+        ----------
+        mode : str
+            timing (단계별 시간만 기록) 또는 cprofile (cProfile 함께 사용)
+        output_dir : str
+            결과 저장 폴더
+        engine_name : str
+            엔진 이름
+        username : str
+            사용자 이름
+        """
+        self.mode = mode
+        self.output_dir = output_dir
+        self.engine_name = engine_name
+        self.username = username
+        self.timer = StageTimer()
+        self.profile = cProfile.Profile() if mode == 'cprofile' else None
+        self.started = None
+
+    def start(self):
+        """측정 시작"""
+        self.started = perf_counter()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self, audio_seconds):
+        """
+        측정 종료 후 요약(.txt)과 cProfile 결과(.prof) 저장
+
+        Parameters
+        ----------
+        audio_seconds : float
+            세션에서 처리한 오디오 길이 (초)
+
+        Returns
+        -------
+        str
+            저장한 요약 파일 경로
+        """
+        if self.profile is not None:
+            self.profile.disable()
+        elapsed = perf_counter() - self.started
+
+        current_date, current_time = get_today()
+        prefix = os.path.join(self.output_dir, f"{current_date}_{current_time}_"
+                                               f"{self.engine_name.replace(':', '-')}_{self.username}")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        rtf = elapsed / audio_seconds if audio_seconds else 0.0
+        lines = [f'engine[{self.engine_name}] user[{self.username}] mode[{self.mode}]',
+                 f'session[{elapsed:.3f}s] audio[{audio_seconds:.3f}s] rtf[{rtf:.3f}]',
+                 '',
+                 self.timer.summary()]
+
+        if self.profile is not None:
+            self.profile.dump_stats(f'{prefix}.prof')
+            stream = io.StringIO()
+            pstats.Stats(self.profile, stream=stream).sort_stats('cumulative').print_stats(30)
+            lines += ['', stream.getvalue()]
+
+        with open(f'{prefix}.txt', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return f'{prefix}.txt'
@@ -0,0 +1,128 @@
+import threading
+from collections import deque
+from itertools import count
+from time import time
+
+class PriorityClass:
+    """세션 우선순위 등급"""
+
+    def __init__(self, name, priority=1, deadline=10.0):
+        """
+        우선순위 등급 초기화
+
+        Parameters
+        ----------
+        name : str
+            등급 이름 (%u 옵션 priority 값)
+        priority : int
+            우선순위 (작을수록 먼저 할당)
+        deadline : float
+            엔진 할당 목표 시간 (초). 같은 우선순위에서는 마감이 빠른 요청을 먼저 할당
+        """
+        self.name = name
+        self.priority = priority
+        self.deadline = deadline
+
+class Ticket:
+    """엔진 할당 대기 요청"""
+
+    _seq = count()
+
+    def __init__(self, priority_class):
+        self.priority_class = priority_class
+        self.arrival = time()
+        self.deadline = self.arrival + priority_class.deadline
+        self.seq = next(self._seq)
+
+    def rank(self, now, aging):
+        """
+        할당 순서 키 (작을수록 먼저)
+
+        aging초 기다릴 때마다 우선순위를 한 단계 올려 낮은 등급의 기아 상태를 방지
+        """
+        priority = self.priority_class.priority
+        if aging > 0:
+            priority -= int((now - self.arrival) / aging)
+        return (priority, self.deadline, self.seq)
+
+def percentile(values, ratio):
+    """백분위수 (최근접 순위)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(ratio * len(values)))]
+
+class QosStats:
+    """등급별 할당 대기 시간, 마감 초과 수, 할당 시간 초과 수, 결과 지연 통계"""
+
+    def __init__(self, window=500):
+        """
+        통계 초기화
+
+        Parameters
+        ----------
+        window : int
+            등급별로 보관할 최근 측정값 수
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _get(self, name):
+        return self.stats.setdefault(name, {
+            'sessions': 0,
+            'deadline_miss': 0,
+            'timeouts': 0,
+            'waits': deque(maxlen=self.window),
+            'latencies': deque(maxlen=self.window),
+        })
+
+    def record_wait(self, ticket, allocated_at):
+        """엔진 할당 대기 시간 기록"""
+        with self.lock:
+            stats = self._get(ticket.priority_class.name)
+            stats['sessions'] += 1
+            stats['waits'].append(allocated_at - ticket.arrival)
+            if allocated_at > ticket.deadline:
+                stats['deadline_miss'] += 1
+
+    def record_timeout(self, ticket):
+        """엔진을 할당받지 못한 요청 기록 (할당 대기 시간 통계에는 포함하지 않음)"""
+        with self.lock:
+            self._get(ticket.priority_class.name)['timeouts'] += 1
+
+    def record_latencies(self, name, latencies):
+        """세션의 발화별 결과 지연 기록"""
+        with self.lock:
+            self._get(name)['latencies'].extend(latencies)
+
+    def summary(self):
+        """
+        등급별 통계 문자열 리스트 (%c 상태 응답용)
+
+        Returns
+        -------
+        list
+            등급별 한 줄 요약
+        """
+        lines = []
+        with self.lock:
+            for name, stats in self.stats.items():
+                lines.append(f"class {name}: sessions[{stats['sessions']}] "
+                             f"deadline_miss[{stats['deadline_miss']}] timeouts[{stats['timeouts']}] "
+                             f"wait_p95[{percentile(stats['waits'], 0.95):.2f}s] "
+                             f"latency_p50[{percentile(stats['latencies'], 0.5):.2f}s] "
+                             f"latency_p95[{percentile(stats['latencies'], 0.95):.2f}s]")
+        return lines
+
+def load_classes(scheduler_conf):
+    """
+    설정의 scheduler.classes로 등급 목록 생성
+
+    Returns
+    -------
+    dict
+        {등급 이름: PriorityClass}
+    """
+    return {name: PriorityClass(name, **class_conf)
+            for name, class_conf in (scheduler_conf.get('classes') or {}).items()}
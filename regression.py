@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# encoding :utf-8
+
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import resource
+import sys
+import threading
+import time
+import configargparse
+import yaml
+
+import asr_process
+from asr_process import ASRProcess, ASRConfig, load_engine_modules
+
+# 비교 항목별 허용 범위 (absolute: 차이, relative: 비율)
+METRIC_TOLERANCES = {
+    'wer': ('absolute', 'wer_tolerance'),
+    'cer': ('absolute', 'wer_tolerance'),
+    'rtf': ('relative', 'speed_tolerance'),
+    'latency_p50': ('relative', 'speed_tolerance'),
+    'latency_p95': ('relative', 'speed_tolerance'),
+    'max_rss_mb': ('relative', 'memory_tolerance'),
+}
+
+class ReplayProcess(ASRProcess):
+    """발화별 처리 시간을 기록하는 재생용 ASRProcess (프로세스로 시작하지 않고 직접 호출)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.utterances = []
+
+    def process_audio_segment(self, wavData, epd_start, vad_index, frame_start, whisper_model):
+        started = time.perf_counter()
+        result_text = super().process_audio_segment(wavData, epd_start, vad_index,
+                                                    frame_start, whisper_model)
+        finished = time.perf_counter()
+        self.utterances.append({
+            'audio_end': min(vad_index, len(wavData)) / (self.config.sample_rate * 2),
+            'decode': finished - started,
+            'finished': finished,
+        })
+        return result_text
+
+def normalize_text(text):
+    """비교용 텍스트 정규화 (소문자, 문장 부호 제거, 공백 정리)"""
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return ' '.join(text.split())
+
+def edit_distance(reference, hypothesis):
+    """
+    두 시퀀스의 편집 거리 (Levenshtein)
+
+    Parameters
+    ----------
+    reference : list or str
+        정답 시퀀스
+    hypothesis : list or str
+        인식 결과 시퀀스
+    """
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref != hyp))
+        previous = current
+    return previous[-1]
+
+def error_counts(reference, hypothesis):
+    """
+    단어/문자 오류 수 계산
+
+    CER은 공백을 제외한 문자 단위로 계산
+
+    Returns
+    -------
+    dict
+        {'word_errors', 'words', 'char_errors', 'chars'}
+    """
+    reference = normalize_text(reference)
+    hypothesis = normalize_text(hypothesis)
+    ref_chars = reference.replace(' ', '')
+    return {
+        'word_errors': edit_distance(reference.split(), hypothesis.split()),
+        'words': len(reference.split()),
+        'char_errors': edit_distance(ref_chars, hypothesis.replace(' ', '')),
+        'chars': len(ref_chars),
+    }
+
+def percentile(values, ratio):
+    """정렬된 값의 백분위수 (최근접 순위)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(ratio * len(values)))]
+
+def build_config(conf, args):
+    """설정 파일과 명령행 인자로 ASRConfig 생성"""
+    return ASRConfig(
+        frame_size=conf['audio']['frame_size'],
+        sample_rate=conf['audio']['sample_rate'],
+        frame_duration_ms=conf['audio']['frame_duration_ms'],
+        vad_mode=conf['vad']['mode'] if args.vad_mode is None else args.vad_mode,
+        compact_silence=(conf['vad'].get('compact_silence', False) if args.compact_silence is None
+                         else bool(args.compact_silence)),
+        compact_gap_ms=args.compact_gap_ms or conf['vad'].get('compact_gap_ms', 200),
+        compact_edge_ms=args.compact_edge_ms or conf['vad'].get('compact_edge_ms', 100),
+        socket_timeout=conf['network']['socket_timeout'],
+        model_size=args.model or conf['model']['size'],
+        device=args.device or conf['model']['device'],
+        language=args.language or conf['model']['language'],
+        save_pcm=False,
+        backlog_policy=conf['queue']['policy'],
+        lag_threshold=conf['queue']['lag_threshold'],
+        cpu_threads=args.cpu_threads,
+    )
+
+def replay_file(process, vad, whisper_model, path, args):
+    """
+    PCM 파일 하나를 세션으로 재생
+
+    Returns
+    -------
+    dict
+        파일별 결과 (인식 텍스트, 처리 시간, 발화별 지연)
+    """
+    with open(path, 'rb') as f:
+        pcm = f.read()
+    chunk = int(process.config.sample_rate * 2 * args.chunk_ms / 1000)
+    packets = [(b'%s', bytearray(pcm[i:i + chunk])) for i in range(0, len(pcm), chunk)]
+    packets.append((b'%f', None))
+
+    def feed():
+        # 실시간 재생 시 청크 하나가 녹음되는 시간이 지난 뒤 전달
+        for i, packet in enumerate(packets):
+            if args.realtime:
+                delay = started + min(i + 1, len(packets) - 1) * args.chunk_ms / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if packet[0] == b'%s':
+                process.audio_received.value += len(packet[1])
+            process.data_in.put(packet)
+
+    process.utterances = []
+    process.audio_received.value = 0
+    started = time.perf_counter()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    process.run_session(os.path.basename(path), vad, whisper_model)
+    elapsed = time.perf_counter() - started
+    feeder.join()
+
+    texts = []
+    reason = None
+    while not process.data_out.empty():
+        code, data = process.data_out.get_nowait()
+        if code == '%R':
+            texts.append(data.split(' : ', 1)[-1].strip())
+        elif code == '%F':
+            reason = data
+
+    if args.realtime:
+        # 발화 끝 오디오가 도착한 시점부터 결과 전달까지
+        latencies = [u['finished'] - started - u['audio_end'] for u in process.utterances]
+    else:
+        # 음성 구간 종료 판단부터 결과 전달까지 (리샘플링 + 디코딩)
+        latencies = [u['decode'] for u in process.utterances]
+
+    return {
+        'file': os.path.basename(path),
+        'audio_seconds': len(pcm) / (process.config.sample_rate * 2),
+        'elapsed': elapsed,
+        'text': ' '.join(texts),
+        'latencies': latencies,
+        'reason': reason,
+    }
+
+def summarize(results, config, realtime):
+    """파일별 결과를 전체 지표로 합산"""
+    audio_seconds = sum(result['audio_seconds'] for result in results)
+    elapsed = sum(result['elapsed'] for result in results)
+    latencies = [latency for result in results for latency in result['latencies']]
+    counts = [result['errors'] for result in results if 'errors' in result]
+    words = sum(count['words'] for count in counts)
+    chars = sum(count['chars'] for count in counts)
+
+    return {
+        'files': len(results),
+        'scored_files': len(counts),
+        'audio_seconds': round(audio_seconds, 3),
+        'utterances': len(latencies),
+        'wer': round(sum(count['word_errors'] for count in counts) / words, 4) if words else None,
+        'cer': round(sum(count['char_errors'] for count in counts) / chars, 4) if chars else None,
+        'rtf': round(elapsed / audio_seconds, 4) if audio_seconds else None,
+        'latency_p50': round(percentile(latencies, 0.5), 4),
+        'latency_p95': round(percentile(latencies, 0.95), 4),
+        # 리눅스 ru_maxrss 단위는 KB
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'config': dict({key: getattr(config, key) for key in
+                        ('model_size', 'device', 'language', 'vad_mode', 'compact_silence',
+                         'compact_gap_ms', 'compact_edge_ms', 'sample_rate', 'backlog_policy',
+                         'cpu_threads')},
+                       replay='realtime' if realtime else 'fast'),
+    }
+
+def compare(current, baseline, args):
+    """
+    기준 결과와 비교하여 허용 범위를 넘는 항목 반환
+
+    Returns
+    -------
+    list
+        허용 범위를 넘은 항목 이름 리스트
+    """
+    regressions = []
+    print(f"\n{'metric':<12} {'baseline':>10} {'current':>10} {'delta':>10}")
+    for metric, (kind, tolerance_arg) in METRIC_TOLERANCES.items():
+        old, new = baseline.get(metric), current.get(metric)
+        if old is None or new is None:
+            continue
+        delta = new - old
+        tolerance = getattr(args, tolerance_arg)
+        limit = tolerance if kind == 'absolute' else abs(old) * tolerance
+        regressed = delta > limit
+        if regressed:
+            regressions.append(metric)
+        print(f"{metric:<12} {old:>10.4f} {new:>10.4f} {delta:>+10.4f}{'  REGRESSION' if regressed else ''}")
+
+    changed = {key: (value, current['config'].get(key))
+               for key, value in baseline.get('config', {}).items()
+               if current['config'].get(key) != value}
+    if changed:
+        print(f'설정 차이 (baseline, current): {changed}')
+    return regressions
+
+def get_parser():
+    """설정 파서 생성"""
+    parser = configargparse.ArgumentParser(
+        description='저장된 PCM 파일을 ASRProcess로 재생하여 정확도/속도 측정 및 기준 결과와 비교',
+        config_file_parser_class=configargparse.YAMLConfigFileParser,
+        formatter_class=configargparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--pcm-dir', type=str, required=True,
+                       help='PCM 파일 폴더 (같은 이름의 .txt 파일이 있으면 정답으로 사용)')
+    parser.add_argument('--server-config', type=str, default='config_vad.yaml',
+                       help='서버 설정 파일 (오디오/VAD/모델 설정)')
+    parser.add_argument('--model', type=str, default=None,
+                       help='모델 크기 (기본: 설정 파일)')
+    parser.add_argument('--device', type=str, default=None,
+                       help='실행 장치 (기본: 설정 파일)')
+    parser.add_argument('--language', type=str, default=None,
+                       help='인식 언어 (기본: 설정 파일)')
+    parser.add_argument('--vad-mode', type=int, default=None,
+                       help='VAD 모드 (기본: 설정 파일)')
+    parser.add_argument('--compact-silence', type=int, choices=(0, 1), default=None,
+                       help='무음 압축 사용 여부 (기본: 설정 파일)')
+    parser.add_argument('--compact-gap-ms', type=int, default=None,
+                       help='압축 후 남길 무음 길이 (기본: 설정 파일)')
+    parser.add_argument('--compact-edge-ms', type=int, default=None,
+                       help='앞뒤에 남길 무음 길이 (기본: 설정 파일)')
+    parser.add_argument('--cpu-threads', type=int, default=0,
+                       help='연산 스레드 수 (0 = CTranslate2 기본값)')
+    parser.add_argument('--chunk-ms', type=int, default=100,
+                       help='전송 패킷 길이 (밀리초)')
+    parser.add_argument('--realtime', action='store_true',
+                       help='실시간 속도로 재생 (지연 시간에 음성 구간 종료 대기 포함)')
+    parser.add_argument('--limit', type=int, default=0,
+                       help='재생할 최대 파일 수 (0 = 전체)')
+    parser.add_argument('--baseline', type=str, default=None,
+                       help='비교할 기준 결과 JSON')
+    parser.add_argument('--save-baseline', type=str, default=None,
+                       help='이번 결과를 기준 결과 JSON으로 저장')
+    parser.add_argument('--report', type=str, default=None,
+                       help='파일별 결과를 포함한 전체 결과 JSON 저장 경로')
+    parser.add_argument('--wer-tolerance', type=float, default=0.005,
+                       help='WER/CER 허용 증가량 (절대값)')
+    parser.add_argument('--speed-tolerance', type=float, default=0.1,
+                       help='RTF/지연 시간 허용 증가율')
+    parser.add_argument('--memory-tolerance', type=float, default=0.1,
+                       help='최대 메모리 허용 증가율')
+
+    return parser
+
+if __name__ == '__main__':
+    args = get_parser().parse_args()
+    with open(args.server_config) as f:
+        conf = yaml.safe_load(f)
+
+    paths = sorted(glob.glob(os.path.join(args.pcm_dir, '*.pcm')))
+    if args.limit:
+        paths = paths[:args.limit]
+    if not paths:
+        sys.exit(f'PCM 파일이 없습니다: {args.pcm_dir}')
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    config = build_config(conf, args)
+    load_engine_modules()
+    process = ReplayProcess('replay', (queue.Queue(), queue.Queue()), logging.getLogger('replay'),
+                            config, preload=True)
+    whisper_model = process.initialize_whisper_model()
+    process.warm_up(whisper_model)
+    vad = asr_process.webrtcvad.Vad()
+
+    results = []
+    print(f"{'file':<50} {'audio(s)':>9} {'rtf':>7} {'wer':>7} {'cer':>7}")
+    for path in paths:
+        result = replay_file(process, vad, whisper_model, path, args)
+        reference_path = os.path.splitext(path)[0] + '.txt'
+        wer = cer = '-'
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding='utf-8') as f:
+                result['reference'] = f.read().strip()
+            result['errors'] = error_counts(result['reference'], result['text'])
+            errors = result['errors']
+            wer = f"{errors['word_errors'] / max(errors['words'], 1):.3f}"
+            cer = f"{errors['char_errors'] / max(errors['chars'], 1):.3f}"
+        if result['reason']:
+            print(f"{result['file']} : 세션 오류 {result['reason']}")
+        results.append(result)
+        rtf = result['elapsed'] / result['audio_seconds'] if result['audio_seconds'] else 0.0
+        print(f"{result['file']:<50} {result['audio_seconds']:>9.2f} {rtf:>7.3f} {wer:>7} {cer:>7}")
+
+    summary = summarize(results, config, args.realtime)
+    print('\n' + json.dumps(summary, ensure_ascii=False, indent=2))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'files': results}, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f'기준 결과 저장: {args.save_baseline}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args)
+        if regressions:
+            print(f'허용 범위 초과: {regressions}')
+            sys.exit(1)
@@ -0,0 +1,400 @@
+import json
+import queue
+import select
+import selectors
+import socket
+import threading
+from bisect import bisect_left
+from collections import deque
+from time import time
+
+def encode_packet(code, data):
+    """
+    클라이언트 전송 패킷 생성 (코드 + 4자리 16진수 길이 + 데이터)
+
+    Parameters
+    ----------
+    code : str
+        패킷 코드 (%R, %E, %F)
+    data : str or None
+        패킷 데이터
+    """
+    msg = bytes(data, encoding='utf-8') if data else b''
+    return bytes(f'{code}{len(msg):04x}', encoding='utf-8') + msg
+
+def writable(sock):
+    """
+    소켓에 바로 쓸 수 있는지 확인
+
+    timeout이 설정된 소켓은 send 전에 쓰기 가능할 때까지 대기하므로,
+    전달 스레드가 막히지 않도록 먼저 확인
+    """
+    poller = select.poll()
+    poller.register(sock, select.POLLOUT)
+    return bool(poller.poll(0))
+
+class ResultSession:
+    """결과를 전달받을 클라이언트 세션"""
+
+    def __init__(self, client_socket, asr_process, username, resumable=False, history_limit=100):
+        """
+        세션 초기화
+
+        Parameters
+        ----------
+        client_socket : socket.socket
+            클라이언트 소켓
+        asr_process : ASRProcess
+            세션에 할당된 엔진
+        username : str
+            사용자 이름
+        resumable : bool
+            재연결 가능 여부. True이면 전송 실패 시 세션을 끝내지 않고 분리하며,
+            재연결 시 다시 보낼 수 있도록 보낸 패킷을 보관
+        history_limit : int
+            재연결용으로 보관할 최근 패킷 수
+        """
+        self.client_socket = client_socket
+        self.data_out = asr_process.data_out
+        self.result_notify = asr_process.result_notify
+        self.engine_name = asr_process.engine_name
+        self.username = username
+
+        self.outbox = deque()       # 서버가 직접 보내는 패킷 (%E 상태 등)
+        self.buffer = bytearray()   # 아직 소켓에 쓰지 못한 데이터
+        self.writing = False        # 소켓 쓰기 대기 등록 여부
+        self.finished = False       # 엔진의 %F 수신 여부
+        self.closed = False         # 소켓 종료 여부
+        self.notified = 0           # 알림은 받았지만 아직 출력 큐에서 꺼내지 못한 결과 수
+        self.done = threading.Event()
+
+        self.resumable = resumable
+        self.detached = False       # 연결이 끊겨 재연결 대기 중인지 여부
+        # 클라이언트가 받았다고 확인하지 않은 최근 패킷 (재연결 시 받지 못한 패킷부터 다시 전송)
+        # history_base : history[0]의 세션 내 패킷 번호 (확인되었거나 한도를 넘어 버린 패킷 수)
+        self.history = deque(maxlen=history_limit)
+        self.history_base = 0
+
+        # 결과 지연 측정용 (누적 수신 오디오 길이(초), 수신 시각), 발화별 결과 지연 (초)
+        self.received_audio = []
+        self.received_at = []
+        self.latencies = []
+
+    def mark_received(self, audio_seconds):
+        """오디오 패킷 수신 기록 (누적 수신 오디오 길이)"""
+        self.received_audio.append(audio_seconds)
+        self.received_at.append(time())
+
+    def record_result(self, data):
+        """
+        인식 결과의 지연 기록
+
+        결과의 끝 시간까지의 오디오를 받은 시각부터 결과를 전달하는 시각까지의 시간
+
+        Parameters
+        ----------
+        data : str
+            %R 결과 ('시작 끝 : 텍스트' 또는 JSON)
+        """
+        try:
+            if data.startswith('{'):
+                end = float(json.loads(data)['end'])
+            else:
+                end = float(data.split(' ', 2)[1])
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+            return
+        # 결과 시간은 0.1초 단위로 반올림되어 있음
+        index = bisect_left(self.received_audio, end - 0.05)
+        if index < len(self.received_at):
+            self.latencies.append(time() - self.received_at[index])
+
+class ResultDispatcher(threading.Thread):
+    """
+    모든 세션의 엔진 결과를 하나의 스레드에서 클라이언트로 전달
+
+    엔진의 결과 도착 알림 pipe를 selectors로 대기하다가 알림이 오면 출력 큐에 쌓인 결과를
+    한 번에 꺼내 하나의 쓰기로 전송. 소켓이 바로 받지 못하는 경우 남은 데이터는
+    버퍼에 두고 쓰기 가능 이벤트를 기다리므로 느린 클라이언트가 다른 세션을 막지 않음
+
+    출력 큐는 별도 스레드가 pipe에 쓰므로 알림보다 결과가 늦게 도착할 수 있어,
+    알림 수만큼 결과를 꺼내지 못한 세션은 PENDING_INTERVAL마다 다시 확인
+    """
+
+    PENDING_INTERVAL = 0.01
+
+    def __init__(self, process_logger):
+        """
+        결과 전달 스레드 초기화
+
+        Parameters
+        ----------
+        process_logger : logging.Logger
+            로거
+        """
+        super().__init__(daemon=True)
+        self.logger = process_logger
+        self.selector = selectors.DefaultSelector()
+        self.requests = deque()
+        self.pending = set()  # 알림 수만큼 결과를 꺼내지 못한 세션
+        self.stop_event = threading.Event()
+
+        # 다른 스레드의 요청(세션 등록, 상태 패킷 등)으로 select를 깨우기 위한 소켓
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.wakeup_send.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ, None)
+
+    def wakeup(self):
+        """select 대기 중인 스레드 깨우기"""
+        try:
+            self.wakeup_send.send(b'\0')
+        except BlockingIOError:
+            # 이미 깨우는 중
+            pass
+
+    def register(self, session):
+        """세션 등록 (엔진 결과 전달 시작)"""
+        self.requests.append(('register', session, None))
+        self.wakeup()
+
+    def unregister(self, session):
+        """세션 등록 해제 (엔진의 %F를 받지 못한 채 세션을 끝내는 경우)"""
+        self.requests.append(('unregister', session, None))
+        self.wakeup()
+
+    def post(self, session, code, data):
+        """서버가 만든 패킷을 세션에 전송 (엔진 결과와 같은 순서로 전달)"""
+        session.outbox.append((code, data))
+        self.requests.append(('flush', session, None))
+        self.wakeup()
+
+    def detach(self, session, reason=None, resume=True):
+        """
+        클라이언트 소켓 분리 (엔진 결과는 %F까지 계속 받음)
+
+        재연결 가능 세션은 attach 전까지 결과를 보관하며 세션을 끝내지 않고,
+        그 외에는 엔진의 %F를 받으면 세션 종료
+
+        Parameters
+        ----------
+        session : ResultSession
+            분리할 세션
+        reason : str, optional
+            소켓을 닫기 전에 보낼 %F 데이터 (TIME_OUT 등). None이면 보내지 않음
+        resume : bool
+            재연결을 기다리는지 여부 (재연결 대기 시간이 지난 경우 False)
+        """
+        self.requests.append(('detach', session, (reason, resume)))
+        self.wakeup()
+
+    def attach(self, session, client_socket, received):
+        """
+        재연결한 소켓으로 결과 전달 재개
+
+        Parameters
+        ----------
+        session : ResultSession
+            분리된 세션
+        client_socket : socket.socket
+            새 클라이언트 소켓
+        received : int
+            클라이언트가 받은 패킷 수 (이후 패킷부터 다시 전송)
+        """
+        self.requests.append(('attach', session, (client_socket, received)))
+        self.wakeup()
+
+    def stop(self):
+        """스레드 종료"""
+        self.stop_event.set()
+        self.wakeup()
+
+    def run(self):
+        """결과 도착/소켓 쓰기 가능 이벤트 처리"""
+        while not self.stop_event.is_set():
+            events = self.selector.select(self.PENDING_INTERVAL if self.pending else None)
+            for key, mask in events:
+                if key.data is None:
+                    self.drain_wakeup()
+                    continue
+                self.handle_event(*key.data)
+            # 알림보다 늦게 도착한 결과 확인
+            for session in list(self.pending):
+                self.handle_event('result', session)
+            self.handle_requests()
+
+    def handle_event(self, kind, session):
+        """세션의 결과 도착(result)/소켓 쓰기 가능(write) 이벤트 처리"""
+        if session.done.is_set():
+            return
+        try:
+            if kind == 'result':
+                self.read_results(session)
+            self.flush(session)
+        except Exception as e:
+            self.logger.exception(f'USER[{session.username}] - Engine[{session.engine_name}] : '
+                                  f'{e.__class__.__name__}:{e}')
+            self.close(session)
+            self.finish(session)
+
+    def drain_wakeup(self):
+        """깨우기 소켓 비우기"""
+        try:
+            while self.wakeup_recv.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def handle_requests(self):
+        """다른 스레드에서 요청한 작업 처리"""
+        while self.requests:
+            action, session, args = self.requests.popleft()
+            if session.done.is_set():
+                continue
+            try:
+                if action == 'register':
+                    # 엔진의 결과 도착 알림 pipe 감시
+                    self.selector.register(session.result_notify, selectors.EVENT_READ,
+                                           ('result', session))
+                    self.read_results(session)
+                    self.flush(session)
+                elif action == 'unregister':
+                    self.close(session)
+                    self.finish(session)
+                elif action == 'flush':
+                    self.flush(session)
+                elif action == 'detach':
+                    reason, resume = args
+                    if reason is not None and not session.closed:
+                        # 보내지 못한 결과 뒤에 %F를 붙여 가능한 만큼만 전송
+                        session.buffer += encode_packet('%F', reason)
+                        try:
+                            session.client_socket.send(session.buffer, socket.MSG_DONTWAIT)
+                        except OSError:
+                            pass
+                    self.close(session)
+                    session.buffer.clear()
+                    session.detached = session.resumable and resume
+                    self.flush(session)
+                elif action == 'attach':
+                    session.client_socket, received = args
+                    session.closed = False
+                    session.detached = False
+                    self.replay(session, received)
+                    self.flush(session)
+            except Exception as e:
+                self.logger.exception(f'USER[{session.username}] - Engine[{session.engine_name}] : '
+                                      f'{e.__class__.__name__}:{e}')
+                self.close(session)
+                self.finish(session)
+
+    def replay(self, session, received):
+        """
+        재연결한 클라이언트가 받지 못한 패킷을 전송 버퍼에 추가
+
+        클라이언트가 받았다고 알린 패킷은 보관 목록에서 제거
+
+        Parameters
+        ----------
+        received : int
+            클라이언트가 받은 패킷 수
+        """
+        while session.history and session.history_base < received:
+            session.history.popleft()
+            session.history_base += 1
+        if received < session.history_base:
+            self.logger.warning(f'USER[{session.username}] : Engine[{session.engine_name}] : '
+                                f'보관 한도를 넘어 다시 보낼 수 없는 결과 '
+                                f'[{session.history_base - received}]개')
+        session.buffer = bytearray(b''.join(session.history))
+
+    def read_results(self, session):
+        """출력 큐에 쌓인 결과를 모두 꺼내 전송 버퍼에 추가"""
+        while session.result_notify.poll():
+            session.result_notify.recv_bytes()
+            session.notified += 1
+
+        while not session.finished:
+            try:
+                code, data = session.data_out.get_nowait()
+            except queue.Empty:
+                break
+            session.notified = max(session.notified - 1, 0)
+            self.logger.debug(f'USER[{session.username}] : Engine[{session.engine_name}] : '
+                              f'Response Packet :: code[{code}] :: data[{data}]')
+            if code in ('%R', '%E', '%F'):
+                session.outbox.append((code, data))
+                if code == '%R':
+                    session.record_result(data)
+            else:
+                self.logger.error(f'UNKNOWN_PCODE:{code}-{data}')
+            if code == '%F':
+                session.finished = True
+
+        if session.notified and not session.finished:
+            self.pending.add(session)
+        else:
+            self.pending.discard(session)
+
+    def flush(self, session):
+        """
+        전송 버퍼를 소켓이 받을 수 있는 만큼 전송
+
+        다 보내지 못하면 쓰기 가능 이벤트를 등록하고, %F까지 모두 보낸 경우 세션 종료
+        """
+        while session.outbox:
+            packet = encode_packet(*session.outbox.popleft())
+            if session.resumable:
+                if len(session.history) == session.history.maxlen:
+                    session.history_base += 1
+                session.history.append(packet)
+            session.buffer += packet
+
+        if session.buffer and not session.closed:
+            try:
+                while session.buffer and writable(session.client_socket):
+                    sent = session.client_socket.send(session.buffer, socket.MSG_DONTWAIT)
+                    del session.buffer[:sent]
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                self.logger.error(f'USER[{session.username}] : Engine[{session.engine_name}] : '
+                                  f'결과 전송 실패 - {e.__class__.__name__}:{e}')
+                self.close(session)
+                # 재연결 가능 세션은 세션 스레드가 재연결을 기다리는 동안 결과 보관
+                session.detached = session.resumable
+        if session.closed:
+            session.buffer.clear()
+
+        if session.buffer and not session.writing:
+            self.selector.register(session.client_socket, selectors.EVENT_WRITE, ('write', session))
+            session.writing = True
+        elif not session.buffer and session.writing:
+            self.selector.unregister(session.client_socket)
+            session.writing = False
+
+        if session.finished and not session.buffer and not session.detached:
+            self.close(session)
+            self.finish(session)
+
+    def close(self, session):
+        """클라이언트 소켓 닫기"""
+        if session.writing:
+            self.selector.unregister(session.client_socket)
+            session.writing = False
+        if not session.closed:
+            session.closed = True
+            try:
+                # 수신 대기 중인 세션 스레드도 깨우도록 shutdown 후 close
+                session.client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            session.client_socket.close()
+
+    def finish(self, session):
+        """세션 등록 해제 및 종료 알림"""
+        try:
+            self.selector.unregister(session.result_notify)
+        except (KeyError, ValueError):
+            pass
+        self.pending.discard(session)
+        session.done.set()
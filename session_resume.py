@@ -0,0 +1,111 @@
+import secrets
+import threading
+
+class ResumableSession:
+    """연결이 끊겨도 재연결로 이어갈 수 있는 세션 정보"""
+
+    def __init__(self, username):
+        """
+        재연결 정보 초기화 (세션 토큰 발급)
+
+        Parameters
+        ----------
+        username : str
+            사용자 이름 (재연결 시 같은 사용자인지 확인)
+        """
+        self.token = secrets.token_hex(16)  # %L 환영 메시지로 전달
+        self.username = username
+        self.result_session = None  # 결과 전달 세션 (등록 시 설정)
+        self.resumed = threading.Event()
+
+        # 재연결한 클라이언트 소켓과 클라이언트가 받은 결과 패킷 수
+        self.client_socket = None
+        self.received = 0
+
+class SessionRegistry:
+    """토큰으로 진행 중인 세션을 찾아 재연결한 소켓을 넘겨주는 클래스"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def add(self, session, result_session):
+        """세션 등록 (결과 전달 시작 시)"""
+        session.result_session = result_session
+        with self.lock:
+            self.sessions[session.token] = session
+
+    def remove(self, session):
+        """세션 등록 해제 (재연결 대기 시간 초과 또는 세션 종료 시)"""
+        with self.lock:
+            self.sessions.pop(session.token, None)
+            # 넘겨받지 못한 재연결 소켓 정리
+            if session.client_socket is not None:
+                session.client_socket.close()
+                session.client_socket = None
+
+    def find(self, token, username):
+        """
+        토큰으로 세션 검색
+
+        Returns
+        -------
+        ResumableSession or None
+            등록된 세션. 없거나 사용자가 다르면 None
+        """
+        with self.lock:
+            session = self.sessions.get(token)
+            if session is None or session.username != username:
+                return None
+            return session
+
+    def resume(self, session, client_socket, received):
+        """
+        재연결한 소켓을 세션에 전달
+
+        Parameters
+        ----------
+        session : ResumableSession
+            재연결할 세션
+        client_socket : socket.socket
+            새 클라이언트 소켓 (세션 스레드가 wait_resume으로 넘겨받음)
+        received : int
+            클라이언트가 받은 결과 패킷 수 (%R, %E)
+
+        Returns
+        -------
+        bool
+            전달 여부. 그사이 세션이 끝났으면 False
+        """
+        with self.lock:
+            if self.sessions.get(session.token) is not session:
+                return False
+            if session.client_socket is not None:
+                # 넘겨받기 전에 다시 재연결한 경우 이전 소켓은 버림
+                session.client_socket.close()
+            session.client_socket = client_socket
+            session.received = received
+            session.resumed.set()
+            return True
+
+    def wait_resume(self, session, timeout):
+        """
+        재연결 대기
+
+        Parameters
+        ----------
+        session : ResumableSession
+            대기할 세션
+        timeout : float
+            최대 대기 시간 (초)
+
+        Returns
+        -------
+        socket.socket or None
+            재연결한 클라이언트 소켓. 시간 안에 재연결하지 않으면 None
+        """
+        session.resumed.wait(max(timeout, 0))
+        with self.lock:
+            client_socket, session.client_socket = session.client_socket, None
+            session.resumed.clear()
+            return client_socket
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # encoding :utf-8
 
+import json
 import socket
 import configargparse
 import struct
@@ -70,6 +71,12 @@ def get_parser():
                        help='서버 포트')
     parser.add_argument('--ifn', required=True, 
                        help='입력 PCM 파일 경로')
+    parser.add_argument('--channels', type=int, default=1,
+                       help='입력 PCM 채널 수 (2 이상이면 인터리브 PCM)')
+    parser.add_argument('--format', type=str, default='text', choices=['text', 'json'],
+                       help='결과 형식')
+    parser.add_argument('--words', action='store_true',
+                       help='json 결과에 단어 단위 시간 포함')
                        
     return parser
 
@@ -101,7 +108,14 @@ if __name__ == '__main__':
     print(hCode, hLen, data)
 
     # 3. 사용자 ID 전송 및 환영 메시지 수신
-    sock.sendall(b'%u0006yc7764')
+    user = 'yc7764'
+    if args.channels != 1:
+        user += f';channels={args.channels}'
+    if args.format != 'text':
+        user += f';format={args.format}'
+    if args.words:
+        user += ';words=1'
+    sock.sendall(bytes('%%u%04x%s' % (len(user), user), encoding='utf-8'))
     hCode, hLen, data = recv_packet(sock)
     print(hCode, hLen, data)
     sock.sendall(b'%b0000')
@@ -125,8 +139,11 @@ if __name__ == '__main__':
             continue
         if hCode == b'%R':  # 인식 결과
             print(hCode, hLen, data)
-            temp = data.split(':')
-            result += temp[1].strip() + " "
+            if data.startswith('{'):
+                result += json.loads(data).get('text', '') + " "
+            else:
+                # 텍스트에 ':'가 포함될 수 있으므로 첫 구분자만 사용
+                result += data.partition(' : ')[2].strip() + " "
         if hCode == b'%F':  # 최종 결과
             break
     print(result)
\ No newline at end of file
@@ -1,25 +1,57 @@
+from time import sleep, time
+STARTUP_AT = time()  # 서버 시작 시간 측정 기준 (import 포함)
+
 import logging
+import multiprocessing
 import traceback
 import socket
 import threading
 import signal
 import os
-from time import sleep
-from queue import Queue
+import copy
+import json
+import queue
 from asr_process import ASRProcess, ASRConfig
+from engine_pool import EnginePool, PoolManager, estimate_model_memory
+from engine_supervisor import EngineSupervisor
+from engine_autoscaler import EngineAutoscaler
+from cpu_topology import CpuPlanner
+from result_dispatcher import ResultDispatcher, ResultSession
 from util import *
 import struct
 import yaml
 from multiprocessing import Queue
 from log_util import Log
+from profiling import PROFILE_MODES
+from qos import QosStats, Ticket, load_classes
+from session_resume import ResumableSession, SessionRegistry
 
 MAGIC_STRING = b'WHISPER_STREAMING_V1.0'
 ENGINE_LIST = []
-log_queue = Queue(-1)
+ENGINE_POOLS = None
+SUPERVISOR = None
+CPU_PLANNER = None
+AUTOSCALER = None
+DISPATCHER = None
+PRIORITY_CLASSES = {}
+QOS = QosStats()
+REGISTRY = SessionRegistry()
+log_queue = None
 MAX_CLIENT_N=50
 ENGINE_TIMEOUT = 60
+DISPATCH_TIMEOUT = 5.0  # 결과 전달 스레드의 세션 종료 처리를 기다리는 최대 시간 (초)
+CONFIG_PATH = 'config_vad.yaml'
+RELOAD_LOCK = threading.Lock()
+LOG_LEVELS = {
+    'critical': logging.CRITICAL,
+    'error': logging.ERROR,
+    'warn': logging.WARNING,
+    'warning': logging.WARNING,
+    'info': logging.INFO,
+    'debug': logging.DEBUG
+}
 
-with open('config_vad.yaml') as f:
+with open(CONFIG_PATH) as f:
     conf = yaml.safe_load(f)
     
 def recvall(socket, n):
@@ -43,15 +75,280 @@ def recv_magicstring(client_socket):
         return False
     
 def recv_packet(client_socket):
-    hCode,hLen = struct.unpack('>2s4s', bytes(recvall(client_socket, 6)))
+    header = recvall(client_socket, 6)
+    if header is None:
+        raise ConnectionError('connection closed by client')
+    hCode,hLen = struct.unpack('>2s4s', bytes(header))
     hLen=int(hLen,16)
     if hLen>0: 
         data=recvall(client_socket,hLen)
+        if data is None:
+            raise ConnectionError('connection closed by client')
     else: 
         data=None
 
     return hCode,hLen,data
 
+def parse_user_packet(data):
+    """
+    사용자 정보 패킷(%u) 파싱
+
+    'username;key=value;...' 형식으로 세션 옵션을 함께 전달할 수 있음
+    (예: 'user1234;lang=en;model=base')
+
+    Returns
+    -------
+    tuple
+        (사용자 이름, 세션 옵션 dict)
+    """
+    fields = data.decode('utf-8').split(';')
+    options = {}
+    for field in fields[1:]:
+        key, _, value = field.partition('=')
+        if key.strip():
+            options[key.strip().lower()] = value.strip()
+    return fields[0], options
+
+def put_engine_packet(asr_process, packet, channels=1):
+    """
+    엔진 입력 큐에 패킷 전달
+    
+    입력 큐가 가득 찬 경우 소켓 수신을 멈추고 대기하여 클라이언트에 역압력 전달
+    (수신 오디오 양은 지연 측정을 위해 채널 하나 기준으로 기록).
+    대기 중 엔진 프로세스가 종료되면 더 기다리지 않고 queue.Full 발생
+    """
+    pCode, pData = packet
+    if pCode == b'%s' and pData is not None:
+        asr_process.audio_received.value += len(pData) // channels
+    deadline = time() + conf['network']['socket_timeout']
+    while True:
+        try:
+            asr_process.data_in.put(packet, timeout=min(max(deadline - time(), 0), 1.0))
+            return
+        except queue.Full:
+            if not asr_process.is_alive() or time() >= deadline:
+                raise
+
+def drain_queue(packet_queue):
+    """
+    큐에 남은 패킷 버리기
+
+    엔진이 같은 큐를 동시에 읽을 수 있으므로 empty() 확인 후에도 비어 있을 수 있음
+    """
+    try:
+        while True:
+            packet_queue.get_nowait()
+    except queue.Empty:
+        pass
+
+RESULT_FORMATS = ('text', 'json')
+
+def get_session_options(options):
+    """
+    세션 옵션 중 엔진에 전달할 항목 확인
+
+    - channels : 오디오 채널 수 (1 ~ audio.max_channels)
+    - format : 결과 형식 (text, json)
+    - words : json 결과에 단어 단위 시간 포함 여부
+
+    Returns
+    -------
+    tuple
+        (엔진 세션 옵션 dict, 오류 사유). 지원하지 않는 값이 있으면 (None, 사유)
+    """
+    channels = options.get('channels', '1')
+    if not channels.isdigit() or not 1 <= int(channels) <= conf['audio'].get('max_channels', 1):
+        return None, 'UNSUPPORTED_CHANNELS'
+    result_format = options.get('format', 'text').lower()
+    if result_format not in RESULT_FORMATS:
+        return None, 'UNSUPPORTED_FORMAT'
+    return {
+        'channels': int(channels),
+        'result_format': result_format,
+        'word_timestamps': options.get('words', '').lower() in ('1', 'true', 'on'),
+    }, None
+
+def get_priority_class(username, options):
+    """
+    세션 옵션(priority)에 맞는 우선순위 등급 반환
+
+    지정하지 않았거나 없는 등급인 경우 scheduler.default_class 사용
+    """
+    # 설정 다시 읽기 중에도 같은 등급 목록을 사용하도록 한 번만 읽음
+    classes = PRIORITY_CLASSES
+    default = conf['scheduler']['default_class']
+    name = options.get('priority', default)
+    if name not in classes:
+        logger.warning(f'USER[{username}] : 알 수 없는 우선순위 등급[{name}], {default} 사용')
+        name = default
+    return classes[name]
+
+def check_session_lag(asr_process, result_session, lag_state):
+    """
+    세션 처리 지연(수신 오디오 - 처리 오디오) 확인
+
+    지연 상태가 바뀌면 로그를 남기고, 세션이 요청한 경우 %E 상태 패킷 전송
+    
+    Parameters
+    ----------
+    result_session : ResultSession
+        결과 전달 세션
+    lag_state : dict
+        세션 지연 상태 {'behind': bool, 'max': float, 'status': bool}
+    """
+    lag = asr_process.lag_seconds()
+    lag_state['max'] = max(lag_state['max'], lag)
+
+    threshold = asr_process.config.lag_threshold
+    behind = lag > (threshold / 2 if lag_state['behind'] else threshold)
+    if behind == lag_state['behind']:
+        return
+
+    lag_state['behind'] = behind
+    status = 'BEHIND' if behind else 'NORMAL'
+    logger.warning(f'USER[{result_session.username}] : Engine[{asr_process.engine_name}] : '
+                   f'{status} lag[{lag:.2f}s]')
+    if lag_state['status']:
+        msg = json.dumps({'status': status, 'lag': round(lag, 2)})
+        DISPATCHER.post(result_session, '%E', msg)
+
+def park_session(resumable, result_session, audio_offset, error):
+    """
+    연결이 끊긴 세션을 resume.grace_period 동안 유지하며 재연결 대기
+
+    엔진은 세션 상태(VAD/음성 구간)를 그대로 유지하고, 그동안의 결과는 결과 전달 스레드가 보관.
+    재연결하면 새 소켓으로 %L(토큰, 이어서 보낼 오디오 위치)을 보낸 뒤
+    클라이언트가 받지 못한 결과부터 다시 전송
+
+    Parameters
+    ----------
+    resumable : ResumableSession
+        재연결 정보
+    result_session : ResultSession
+        결과 전달 세션
+    audio_offset : int
+        서버가 받은 오디오 바이트 수 (클라이언트는 이 위치부터 이어서 전송)
+    error : Exception
+        연결이 끊긴 원인
+
+    Returns
+    -------
+    socket.socket or None
+        새 클라이언트 소켓. 대기 시간 안에 재연결하지 않으면 None (결과 전달 종료)
+    """
+    username = result_session.username
+    engine_name = result_session.engine_name
+    grace_period = conf['resume']['grace_period']
+    DISPATCHER.detach(result_session)
+    logger.warning(f'USER[{username}] : Engine[{engine_name}] : 연결 끊김 '
+                   f'({error.__class__.__name__}:{error}), 재연결 대기 '
+                   f'grace_period[{grace_period}s] offset[{audio_offset}]')
+
+    deadline = time() + grace_period
+    while True:
+        client_socket = REGISTRY.wait_resume(resumable, deadline - time())
+        if client_socket is None:
+            logger.warning(f'USER[{username}] : Engine[{engine_name}] : 재연결 대기 시간 초과')
+            REGISTRY.remove(resumable)
+            # 엔진의 %F를 받으면 세션 종료
+            DISPATCHER.detach(result_session, resume=False)
+            return None
+
+        msg = f'resume session[{resumable.token}] offset[{audio_offset}]'
+        try:
+            client_socket.sendall(bytes('%%L%04x%s' % (len(msg), msg), encoding='utf-8'))
+        except OSError as e:
+            logger.error(f'USER[{username}] : Engine[{engine_name}] : 재연결 응답 실패 - '
+                         f'{e.__class__.__name__}:{e}')
+            client_socket.close()
+            continue
+        logger.info(f'USER[{username}] : Engine[{engine_name}] : 재연결 '
+                    f'offset[{audio_offset}] received[{resumable.received}]')
+        DISPATCHER.attach(result_session, client_socket, resumable.received)
+        return client_socket
+
+def handle_resume(client_socket, ip, username, options):
+    """
+    재연결 요청 처리 (%u 옵션 resume=<토큰>;received=<받은 결과 패킷 수>)
+
+    성공하면 소켓은 세션 스레드가 이어서 사용. 서버가 아직 이전 연결이 끊긴 것을
+    알지 못한 경우(응답 없이 끊긴 모바일 연결 등)에는 이전 연결을 분리하고 넘겨줌
+    """
+    received = options.get('received', '0')
+    resumable = REGISTRY.find(options['resume'], username) if conf['resume']['enabled'] else None
+    if resumable is not None and received.isdigit():
+        # 이전 소켓 분리가 새 소켓 연결(attach)보다 먼저 처리되도록 먼저 요청
+        DISPATCHER.detach(resumable.result_session)
+        if REGISTRY.resume(resumable, client_socket, int(received)):
+            logger.info(f'IP[{ip}] : USER[{username}] : 재연결 요청 전달')
+            return
+
+    msg = '{"reason": "RESUME_FAILED"}'
+    logger.error(f'RESUME_FAILED :: USER[{username}] : options[{options}]')
+    try:
+        client_socket.sendall(bytes('%%R%04x%s'%(len(msg),msg),encoding='utf-8'))
+        client_socket.sendall(b'%F0000')
+        client_socket.close()
+    except Exception as e:
+        error_msg = f'{e.__class__.__name__}:{e}'
+        logger.exception(error_msg)
+
+def request_profile(args):
+    """
+    엔진에 다음 N개 세션 프로파일링 요청
+
+    Parameters
+    ----------
+    args : list
+        [엔진 이름, 세션 수(0이면 취소), 모드(timing|cprofile, 기본 timing)]
+
+    Returns
+    -------
+    str
+        응답 메시지
+    """
+    usage = f"usage: profile <engine> <sessions> [{'|'.join(PROFILE_MODES)}]"
+    if len(args) not in (2, 3) or not args[1].isdigit():
+        return usage
+    mode = args[2] if len(args) == 3 else PROFILE_MODES[0]
+    if mode not in PROFILE_MODES:
+        return usage
+
+    for engine in list(ENGINE_LIST):
+        if engine['process'].engine_name == args[0]:
+            profile_dir = Log().get_log_dir(conf['logging']['log_path'], 'profile')
+            try:
+                SUPERVISOR.send_control(engine, ('profile', mode, profile_dir, int(args[1])))
+            except (BrokenPipeError, OSError) as e:
+                return f'engine not available: {args[0]} ({e.__class__.__name__})'
+            return f'profile requested: engine[{args[0]}] sessions[{args[1]}] mode[{mode}]'
+    return f'unknown engine: {args[0]}'
+
+def handle_admin(client_socket, ip, command):
+    """
+    관리자 명령 패킷(%a) 처리
+
+    Parameters
+    ----------
+    command : str
+        관리자 명령 (reload, profile <engine> <sessions> [timing|cprofile])
+    """
+    args = command.split()
+    if ip not in conf['admin']['allow_ips']:
+        msg = 'permission denied'
+        logger.error(f'IP[{ip}] : ADMIN_PERMISSION_DENIED : command[{command}]')
+    elif args and args[0] == 'reload':
+        threading.Thread(target=reload_config, daemon=True).start()
+        msg = 'reload started'
+    elif args and args[0] == 'profile':
+        msg = request_profile(args[1:])
+    else:
+        msg = f'unknown command: {command}'
+    logger.info(f'IP[{ip}] : admin command[{command}] : {msg}')
+    client_socket.sendall(bytes('%%C%04x%s' % (len(msg), msg), encoding='utf-8'))
+    client_socket.sendall(b'%F0000')
+    client_socket.close()
+
 def handle_client(client_socket,ip,addr):
     client_socket.settimeout(conf['network']['socket_timeout'])
 ## stage 0: check magic string
@@ -76,48 +373,73 @@ def handle_client(client_socket,ip,addr):
         return
     
     if pCode == b'%u':
-        username=pData.decode('utf-8')
+        username, options = parse_user_packet(pData)
+        if 'resume' in options:
+            handle_resume(client_socket, ip, username, options)
+            return
     elif pCode == b'%c':
         for idx,engine in enumerate(ENGINE_LIST):
-            if engine['running']:
+            if engine['state'] != 'ready':
+                msg = 'engine ' + str(idx) + ': ' + engine['state']
+            elif engine['running']:
                 msg = 'engine ' + str(idx) + ': running'
-                client_socket.sendall(bytes('%%C%04x%s' % (len(msg), msg), encoding='utf-8'))
-            else:
+            elif engine['loaded']:
                 msg = 'engine ' + str(idx) + ': sleeping'
-                client_socket.sendall(bytes('%%C%04x%s' % (len(msg), msg), encoding='utf-8'))
+            else:
+                msg = 'engine ' + str(idx) + ': unloaded'
+            msg += ' [' + engine['pool'] + ']'
+            client_socket.sendall(bytes('%%C%04x%s' % (len(msg), msg), encoding='utf-8'))
+        for msg in QOS.summary():
+            client_socket.sendall(bytes('%%C%04x%s' % (len(msg), msg), encoding='utf-8'))
         client_socket.sendall(b'%F0000')
         client_socket.close()
         return
+    elif pCode == b'%a':
+        handle_admin(client_socket, ip, pData.decode('utf-8') if pData else '')
+        return
     else:
         illegal_packet_error_log(client_socket,ip, addr, 'ILLEGAL_PACKET_USERNAME')
         return
         
 ## stage 2: initialize engine information from client
     allocated = False
-    eid = -1
+    engine = None
+    pool = ENGINE_POOLS.find_pool(options.get('lang'), options.get('model'))
+    session_options, reason = get_session_options(options)
+    if pool is None:
+        reason = 'UNSUPPORTED_MODEL'
+    if reason is not None:
+        msg = '{"reason": "%s"}' % reason
+        logger.error(f'{reason} :: USER[{username}] : options[{options}]')
+        try:
+            client_socket.sendall(bytes('%%R%04x%s'%(len(msg),msg),encoding='utf-8'))
+            client_socket.sendall(b'%F0000')
+            client_socket.close()
+        except Exception as e:
+            error_msg = f'{e.__class__.__name__}:{e}'
+            logger.exception(error_msg)
+        return
     
-## stage 3: get idle engine & set engine to busy
-    for i in range(ENGINE_TIMEOUT):
-        for idx,engine in enumerate(ENGINE_LIST):
-            if engine['running']:
-                continue
-            else:
-                engine['running']=True
-                eid=idx
-                asr_process=engine['process']
-                allocated=True
-                logger.info(f'USER[{username}] : Engine[{asr_process.engine_name}] : running')
-                break
-        if allocated:
-            break
-        else:
-            sleep(1)
+## stage 3: get idle engine of the requested pool & set engine to busy
+    priority_class = get_priority_class(username, options)
+    ticket = Ticket(priority_class)
+    engine = ENGINE_POOLS.allocate(pool, ENGINE_TIMEOUT, ticket)
+    if engine is not None:
+        QOS.record_wait(ticket, time())
+        asr_process=engine['process']
+        allocated=True
+        logger.info(f'USER[{username}] : Engine[{asr_process.engine_name}] : running '
+                    f'class[{priority_class.name}] wait[{time() - ticket.arrival:.2f}s]')
 
 ## stage 4: receive signal buffer & send recognition result
     if allocated:
         session=True
         logger.info(f'[{asr_process.engine_name}] is allocated from {ip}')
+        # 재연결용 세션 토큰은 환영 메시지로 전달
+        resumable = ResumableSession(username) if conf['resume']['enabled'] else None
         msg='welcome message for user[%s]'%username
+        if resumable is not None:
+            msg += ' session[%s]' % resumable.token
         logger.info(f'IP[{ip}] : {msg}')
         try:
             client_socket.sendall(bytes('%%L%04x%s' % (len(msg), msg), encoding='utf-8'))
@@ -129,50 +451,30 @@ def handle_client(client_socket,ip,addr):
                     break
                 else:
                     illegal_packet_error_log(client_socket,ip, addr, 'ILLEGAL_PACKET')
+                    ENGINE_POOLS.release(engine)
                     return
         except Exception as e:
             illegal_packet_error_log(client_socket,ip, addr, 'DISCONNECTED_WELCOME_MSG')
+            ENGINE_POOLS.release(engine)
             return
 
         ## clear queue ####
         try:
-            while not asr_process.data_out.empty():
-                asr_process.data_out.get_nowait()
-            while not asr_process.data_in.empty():
-                asr_process.data_in.get_nowait()
+            drain_queue(asr_process.data_out)
+            drain_queue(asr_process.data_in)
+            while asr_process.result_notify.poll():
+                asr_process.result_notify.recv_bytes()
         except Exception as e:
             error_msg = f'USER[{username}] - Engine[{asr_process.engine_name}] : {e.__class__.__name__}:{e}'
             logger.exception(error_msg)
 
-        def read_asr_process(socket):
-            while (True):
-                sleep(0.001)
-                try:
-                    (pCode, pData) = asr_process.data_out.get()
-                    logger.info(f"USER[{username}] : Engine[{asr_process.engine_name}] : "
-                         f"Response Packet :: code[{pCode}] :: data[{pData}]")
-                    
-                    if pCode == '%F':
-                        client_socket.sendall(b'%F0000')
-                        client_socket.close()
-                        break
-                    elif pCode == '%R':
-                        msg = bytes(pData,encoding='utf-8')
-                        msg_len = len(msg)
-                        cmd = bytes('%R',encoding='utf-8')
-                        client_socket.sendall(cmd+bytes('%04x'%msg_len,encoding='utf-8')+msg)
-                    elif pCode == '%E':
-                        msg = bytes(pData, encoding='utf-8')
-                        msg_len = len(msg)
-                        cmd = bytes('%E', encoding='utf-8')
-                        client_socket.sendall(cmd + bytes('%04x' % msg_len, encoding='utf-8') + msg)
-                    else:   
-                        logger.error(f"UNKNOWN_PCODE:{pCode}-{pData}")
-                        pass
-                except Exception as e:
-                    error_msg = f'USER[{username}] - Engine[{asr_process.engine_name}] : {e.__class__.__name__}:{e}'
-                    logger.exception(error_msg)
-                    break
+        # 엔진 결과는 DISPATCHER 스레드가 클라이언트로 전달
+        result_session = ResultSession(client_socket, asr_process, username, resumable is not None,
+                                       conf['resume'].get('history_limit', 100))
+        registered = False
+        started = False       # 엔진에 세션 시작(%b) 전달 여부
+        finish_sent = False   # 엔진에 세션 종료(%f) 전달 여부
+        done_deadline = None  # 엔진의 %F(세션 종료)를 기다리는 기한
         try:
             pCode, pLen, pData = recv_packet(client_socket)
             logger.debug(f'[{asr_process.engine_name}]-USER[{username}] : recv code[{pCode}] len[{pLen}]')
@@ -182,50 +484,110 @@ def handle_client(client_socket,ip,addr):
                          f"Response Packet :: code[{pCode}] :: data[{pData}]")
                 client_socket.close()
                 sleep(1)
-                ENGINE_LIST[eid]['running']=False;
+                ENGINE_POOLS.release(engine)
             else:
-                t1=threading.Thread(target=read_asr_process,args=(client_socket,))
-                t1.start()
+                DISPATCHER.register(result_session)
+                registered = True
+                if resumable is not None:
+                    REGISTRY.add(resumable, result_session)
 
-                asr_process.data_in.put((b'%b', username))
-                asr_process.data_in.put((pCode,pData))
+                lag_state = {'behind': False, 'max': 0.0,
+                             'status': options.get('status', '').lower() in ('1', 'true', 'on')}
+                asr_process.audio_received.value = 0
+                bytes_per_second = asr_process.config.sample_rate * 2
+                channels = session_options['channels']
+                put_engine_packet(asr_process, (b'%b', (username, session_options)))
+                started = True
+                put_engine_packet(asr_process, (pCode,pData), channels)
+                # 재연결 시 클라이언트가 이어서 보낼 오디오 위치 (받은 오디오 바이트 수)
+                audio_offset = pLen if pCode == b'%s' else 0
 
                 while session:
-                    pCode, pLen, pData = recv_packet(client_socket)
+                    try:
+                        pCode, pLen, pData = recv_packet(client_socket)
+                    except OSError as e:
+                        # 타임아웃 또는 연결 끊김 : 재연결 가능 세션은 재연결 대기
+                        if resumable is None:
+                            raise
+                        if result_session.done.is_set():
+                            # 엔진 장애 등으로 세션이 이미 끝난 경우
+                            break
+                        client_socket = park_session(resumable, result_session, audio_offset, e)
+                        if client_socket is None:
+                            break
+                        continue
                     logger.debug(f'[{asr_process.engine_name}]-USER[{username}] : recv code[{pCode}] len[{pLen}]')
-                    asr_process.data_in.put((pCode,pData))
+                    put_engine_packet(asr_process, (pCode,pData), channels)
+                    if pCode == b'%s':
+                        audio_offset += pLen
+                        result_session.mark_received(asr_process.audio_received.value / bytes_per_second)
+                    check_session_lag(asr_process, result_session, lag_state)
 
                     if pCode == b'%f':
+                        finish_sent = True
                         break
-                t1.join()
-                logger.info(f'Engine[{asr_process.engine_name}] : {username} 요청 처리 종료')
+
+                # %f 이후 엔진의 %F를 socket_timeout까지 대기, 결과 전송 중 연결이 끊긴 경우에도
+                # 재연결 대기 (재연결 대기 시간이 이미 지난 경우 client_socket은 None)
+                done_deadline = time() + conf['network']['socket_timeout']
+                while (client_socket is not None and not result_session.done.wait(1.0)
+                       and time() < done_deadline):
+                    if result_session.detached:
+                        client_socket = park_session(resumable, result_session, audio_offset,
+                                                     ConnectionError('result delivery failed'))
+                        if client_socket is None:
+                            break
+                        done_deadline = time() + conf['network']['socket_timeout']
+                logger.info(f'Engine[{asr_process.engine_name}] : {username} 요청 처리 종료 '
+                            f'max_lag[{lag_state["max"]:.2f}s]')
         except socket.timeout:
             error_msg = f'[{asr_process.engine_name}]-USER[{username}] : time_out error'
             logger.error(error_msg)
-            timeout_error_log(client_socket,ip, addr, 'TIME_OUT')
+            if registered:
+                # 결과 전달 스레드에 등록된 소켓은 결과 전달 스레드가 %F 전송 후 닫음
+                DISPATCHER.detach(result_session, 'TIME_OUT', resume=False)
+            else:
+                timeout_error_log(client_socket,ip, addr, 'TIME_OUT')
             logger.info(f"USER[{username}] : Engine[{asr_process.engine_name}] : "
                          f"Response Packet :: code[%%F] :: data[TIME_OUT]")
         except Exception as e:
             error_msg = f'USER[{username}] - Engine[{asr_process.engine_name}] : {e.__class__.__name__}:{e}'
             logger.exception(error_msg)
         finally:
-            try:
-                while not asr_process.data_out.empty():
-                    asr_process.data_out.get_nowait()
-                while not asr_process.data_in.empty():
-                    asr_process.data_in.get_nowait()
-                asr_process.data_in.put((b'%f', None))
-            except Exception as e:
-                error_msg = f'USER[{username}] - Engine[{asr_process.engine_name}] : {e.__class__.__name__}:{e}'
-                logger.exception(error_msg)
-
-            sleep(1)
-            ENGINE_LIST[eid]['running']=False;
+            # 엔진이 세션을 처리 중인데 %f를 받지 못한 경우(타임아웃, 연결 끊김 등)에만 전달
+            # (이미 %F를 보낸 엔진에 %f를 넣으면 다음 세션의 입력 큐에 남음)
+            # 장애로 종료(재시작)된 엔진은 감시 스레드가 %F로 세션을 끝내므로 보내지 않음
+            engine_failed = engine['process'] is not asr_process or engine['state'] == 'failed'
+            if registered and not finish_sent and not result_session.finished and not engine_failed:
+                try:
+                    drain_queue(asr_process.data_in)
+                    # 입력을 비운 뒤이므로 대기하지 않음 (가득 차 있으면 엔진이 읽지 못하는 상태)
+                    asr_process.data_in.put_nowait((b'%f', None))
+                except Exception as e:
+                    error_msg = f'USER[{username}] - Engine[{asr_process.engine_name}] : {e.__class__.__name__}:{e}'
+                    logger.exception(error_msg)
+
+            if registered:
+                # 엔진의 %F(세션 종료)를 받은 뒤 반환해야 다음 세션에 이전 결과가 섞이지 않음
+                if done_deadline is None:
+                    done_deadline = time() + conf['network']['socket_timeout']
+                if not result_session.done.wait(max(done_deadline - time(), 0)):
+                    logger.error(f'USER[{username}] : Engine[{asr_process.engine_name}] : '
+                                 f'엔진 응답(%F) 없음, 세션 강제 종료')
+                    DISPATCHER.unregister(result_session)
+                    if not result_session.done.wait(DISPATCH_TIMEOUT):
+                        logger.error(f'USER[{username}] : Engine[{asr_process.engine_name}] : '
+                                     f'결과 전달 스레드 응답 없음')
+                QOS.record_latencies(priority_class.name, result_session.latencies)
+            if resumable is not None:
+                REGISTRY.remove(resumable)
+            ENGINE_POOLS.release(engine, started)
             
             logger.info(f"USER[{username}] : Engine[{asr_process.engine_name}] : "
-                 f"read_asr_process_done")
+                 f"session_done")
     
     else:
+        QOS.record_timeout(ticket)
         msg = '{"reason": "SERVER_TOO_BUSY"}'
         logger.error(f'SERVER_TOO_BUSY :: USER[{username}]')
         try:
@@ -236,49 +598,244 @@ def handle_client(client_socket,ip,addr):
             error_msg = f'{e.__class__.__name__}:{e}'
             logger.exception(error_msg)
             traceback.print_exc()
-def main(args):
-    global MAX_CLIENT_N
-    global server_ip
-    
-    server_ip = conf['network']['ip']
+def build_asr_config(pool_conf):
+    """
+    설정 파일과 풀 설정으로부터 ASRConfig 생성
 
-    asr_config = ASRConfig(
+    Parameters
+    ----------
+    pool_conf : dict
+        풀 설정 (size, language 등). 없는 항목은 model 섹션 값을 사용
+    """
+    model_conf = conf['model']
+    return ASRConfig(
         save_pcm=conf['logging']['save_pcm'],  # PCM 파일 저장 여부
         pcm_path=conf['logging']['pcm_path'],  # PCM 파일 저장 경로
         frame_size=conf['audio']['frame_size'],
         sample_rate=conf['audio']['sample_rate'],
         frame_duration_ms=conf['audio']['frame_duration_ms'],
         vad_mode=conf['vad']['mode'],
+        compact_silence=conf['vad'].get('compact_silence', False),
+        compact_gap_ms=conf['vad'].get('compact_gap_ms', 200),
+        compact_edge_ms=conf['vad'].get('compact_edge_ms', 100),
         socket_timeout=conf['network']['socket_timeout'],
-        model_size=conf['model']['size'],
-        device=conf['model']['device'],
-        language=conf['model']['language']
+        resume_grace=conf['resume']['grace_period'] if conf['resume']['enabled'] else 0,
+        model_size=pool_conf.get('size', model_conf['size']),
+        device=pool_conf.get('device', model_conf['device']),
+        language=pool_conf.get('language', model_conf['language']),
+        lazy_load=pool_conf.get('lazy_load', model_conf.get('lazy_load', False)),
+        backlog_policy=conf['queue']['policy'],
+        lag_threshold=conf['queue']['lag_threshold'],
+        cpu_threads=CPU_PLANNER.threads,
+        num_workers=CPU_PLANNER.num_workers
     )
 
+def get_pool_confs():
+    """
+    설정 파일의 풀 목록 반환
+
+    model 섹션 자체가 기본 풀이며, model.pools에 추가 풀을 정의할 수 있음
+    """
+    model_conf = conf['model']
+    pool_confs = [{
+        'name': model_conf['language'],
+        'size': model_conf['size'],
+        'language': model_conf['language'],
+        'channel': model_conf['channel'],
+        'memory_mb': model_conf.get('memory_mb'),
+        'max_channel': model_conf.get('max_channel'),
+    }]
+    for pool_conf in model_conf.get('pools') or []:
+        pool_conf = dict(pool_conf)
+        pool_conf.setdefault('language', model_conf['language'])
+        pool_conf.setdefault('size', model_conf['size'])
+        pool_conf.setdefault('name', f"{pool_conf['language']}-{pool_conf['size']}")
+        pool_conf.setdefault('channel', 1)
+        pool_confs.append(pool_conf)
+
+    # 자동 확장을 사용하지 않으면 channel 고정
+    for pool_conf in pool_confs:
+        if conf['autoscale']['enabled']:
+            max_channel = pool_conf.get('max_channel') or conf['autoscale']['max_channel']
+            pool_conf['max_channel'] = max(max_channel, pool_conf['channel'])
+        else:
+            pool_conf['max_channel'] = pool_conf['channel']
+    return pool_confs
+
+def create_engine_process(engine_name, asr_config, preload=None):
+    """엔진 프로세스 생성 (시작 전)"""
+    asr_config = copy.copy(asr_config)
+    asr_config.cpu_affinity = CPU_PLANNER.assign(engine_name)
+    return ASRProcess(engine_name,
+                      (Queue(conf['queue']['max_in']), Queue(conf['queue']['max_out'])),
+                      logger, asr_config, preload, log_queue)
+
+def add_pool(pool_conf):
+    """풀 설정으로 풀을 만들어 등록 (엔진은 생성만 하고 시작하지 않음)"""
+    asr_config = build_asr_config(pool_conf)
+    pool = EnginePool(pool_conf['name'], asr_config, pool_conf['channel'],
+                      pool_conf.get('memory_mb'), pool_conf['max_channel'])
+    ENGINE_POOLS.add_pool(pool)
+    for i in range(pool.channel):
+        ENGINE_POOLS.add_engine(
+            pool,
+            create_engine_process(pool.next_engine_name(), asr_config),
+            loaded=not asr_config.lazy_load)
+    return pool
+
+def reload_config():
+    """
+    설정 파일을 다시 읽어 적용 (SIGHUP 또는 관리자 reload 명령)
+
+    서버 측 설정과 엔진의 실행 중 변경 가능한 설정(ASRConfig.RUNTIME_KEYS)은 즉시 적용하고,
+    모델/오디오/큐 설정이 바뀐 풀은 엔진을 하나씩 새 엔진으로 교체
+    """
+    global conf
+    global PRIORITY_CLASSES
+    if not RELOAD_LOCK.acquire(blocking=False):
+        logger.warning('설정을 이미 다시 읽는 중입니다')
+        return
+
+    try:
+        with open(CONFIG_PATH) as f:
+            new_conf = yaml.safe_load(f)
+        old_conf = conf
+        conf = new_conf
+        pool_confs = {pool_conf['name']: pool_conf for pool_conf in get_pool_confs()}
+        logger.info(f'설정 다시 읽기 시작 : {CONFIG_PATH}')
+
+        # 서버 측 설정
+        for key in ('ip', 'port'):
+            if old_conf['network'][key] != new_conf['network'][key]:
+                logger.warning(f'network.{key} 변경은 서버 재시작 후 적용됩니다')
+        if old_conf['model'].get('start_method') != new_conf['model'].get('start_method'):
+            logger.warning('model.start_method 변경은 서버 재시작 후 적용됩니다')
+        if old_conf['cpu'] != new_conf['cpu']:
+            logger.warning('cpu 설정 변경은 서버 재시작 후 적용됩니다')
+        level = LOG_LEVELS.get(new_conf['logging']['level'])
+        logger.setLevel(level)
+        ENGINE_POOLS.memory_budget_mb = new_conf['model'].get('memory_budget_mb', 0)
+        ENGINE_POOLS.aging = new_conf['scheduler']['aging']
+        # 다른 스레드가 비어 있는 목록을 보지 않도록 새 목록으로 한 번에 교체
+        PRIORITY_CLASSES = load_classes(new_conf['scheduler'])
+        SUPERVISOR.configure(**new_conf['supervisor'])
+        AUTOSCALER.configure(**new_conf['autoscale'])
+        for engine in list(ENGINE_LIST):
+            SUPERVISOR.send_control(engine, ('log_level', level))
+
+        # 새로 추가된 풀
+        for name in pool_confs.keys() - ENGINE_POOLS.pools.keys():
+            pool = add_pool(pool_confs[name])
+            for engine in ENGINE_POOLS.pool_engines(pool):
+                SUPERVISOR.start_engine(engine)
+            logger.info(f'풀[{name}] 추가')
+
+        # 삭제된 풀
+        for name in ENGINE_POOLS.pools.keys() - pool_confs.keys():
+            pool = ENGINE_POOLS.pools[name]
+            for engine in ENGINE_POOLS.pool_engines(pool):
+                SUPERVISOR.retire_engine(engine)
+            ENGINE_POOLS.remove_pool(pool)
+            logger.info(f'풀[{name}] 삭제')
+        ENGINE_POOLS.default_pool = ENGINE_POOLS.pools[new_conf['model']['language']]
+
+        # 변경된 풀
+        queue_changed = old_conf['queue'] != new_conf['queue']
+        for name, pool in list(ENGINE_POOLS.pools.items()):
+            pool_conf = pool_confs[name]
+            new_config = build_asr_config(pool_conf)
+            changed = pool.config.diff(new_config)
+
+            runtime = {key: getattr(new_config, key) for key in changed if key in ASRConfig.RUNTIME_KEYS}
+            if runtime:
+                for key, value in runtime.items():
+                    setattr(pool.config, key, value)
+                for engine in ENGINE_POOLS.pool_engines(pool):
+                    SUPERVISOR.send_control(engine, ('config', runtime))
+                logger.info(f'풀[{name}] 설정 변경 {runtime}')
+
+            if queue_changed or set(changed) - set(ASRConfig.RUNTIME_KEYS):
+                memory_mb = pool_conf.get('memory_mb') or estimate_model_memory(new_config.model_size)
+                # 교체가 끝날 때까지 풀 설정(요청 매칭 기준)은 기존 모델로 유지하고,
+                # 할당은 엔진별 실제 모델 기준 (PoolManager.try_allocate)
+                replaced = all(SUPERVISOR.replace_engine(engine, new_config, memory_mb)
+                               for engine in ENGINE_POOLS.pool_engines(pool))
+                if replaced:
+                    with ENGINE_POOLS.available:
+                        pool.config = new_config
+                        pool.memory_mb = memory_mb
+                        ENGINE_POOLS.available.notify_all()
+                    logger.info(f'풀[{name}] 엔진 교체 완료')
+                else:
+                    logger.error(f'풀[{name}] 엔진 교체 실패, 풀 설정은 기존 모델로 유지 '
+                                 f'(다음 설정 다시 읽기 시 다시 교체)')
+
+            engines = ENGINE_POOLS.pool_engines(pool)
+            pool.channel = pool_conf['channel']
+            pool.max_channel = pool_conf['max_channel']
+            for i in range(pool.channel - len(engines)):
+                SUPERVISOR.add_engine(pool)
+            for engine in engines[pool.max_channel:]:
+                SUPERVISOR.retire_engine(engine)
+
+        logger.info('설정 다시 읽기 완료')
+    except Exception as e:
+        error_msg = f'설정 다시 읽기 실패 - {e.__class__.__name__}:{e}'
+        logger.exception(error_msg)
+    finally:
+        RELOAD_LOCK.release()
+
+def main(args):
+    global MAX_CLIENT_N
+    global server_ip
+    global ENGINE_POOLS
+    global SUPERVISOR
+    global CPU_PLANNER
+    global AUTOSCALER
+    global DISPATCHER
+    global PRIORITY_CLASSES
+    global log_queue
+    
+    server_ip = conf['network']['ip']
+    main_at = time()
+
+    # 엔진 프로세스 시작 방식 (Queue 등 프로세스 간 객체 생성 전에 설정)
+    if conf['model'].get('start_method'):
+        multiprocessing.set_start_method(conf['model']['start_method'])
+    log_queue = Queue(-1)
+
     global logger
-    levels = {
-        'critical': logging.CRITICAL,
-        'error': logging.ERROR,
-        'warn': logging.WARNING,
-        'warning': logging.WARNING,
-        'info': logging.INFO,
-        'debug': logging.DEBUG
-    }
-    level = levels.get(conf['logging']['level'])
+    level = LOG_LEVELS.get(conf['logging']['level'])
 
     listeners = Log()
     listeners.listener_start(conf['logging']['log_path'], level, 'listener', log_queue)
     logger = Log().config_queue_log(log_queue, level, 'log')
 
-    for i in range(conf['model']['channel']):
-        ENGINE_NAME=conf['model']['language']+":"+str(i)
-        ENGINE_LIST.append({
-            'running': False,
-            'process': ASRProcess(ENGINE_NAME, (Queue(), Queue()), logger, asr_config)
-        })
+    CPU_PLANNER = CpuPlanner(sum(pool_conf['max_channel'] for pool_conf in get_pool_confs()),
+                             **conf['cpu'])
+    logger.info(f'CPU 배치 계획 : {CPU_PLANNER.summary()}')
+
+    ENGINE_POOLS = PoolManager(ENGINE_LIST, logger, conf['model'].get('memory_budget_mb', 0),
+                               conf['scheduler']['aging'])
+    PRIORITY_CLASSES = load_classes(conf['scheduler'])
+    for pool_conf in get_pool_confs():
+        add_pool(pool_conf)
+    if 0 < ENGINE_POOLS.memory_budget_mb < ENGINE_POOLS.loaded_memory():
+        logger.warning(f'미리 로드되는 모델 메모리[{ENGINE_POOLS.loaded_memory()}MB]가 '
+                       f'memory_budget_mb[{ENGINE_POOLS.memory_budget_mb}MB]를 초과합니다')
+
+    DISPATCHER = ResultDispatcher(logger)
+    DISPATCHER.start()
+    SUPERVISOR = EngineSupervisor(ENGINE_POOLS, logger, create_engine_process, CPU_PLANNER.release,
+                                  **conf['supervisor'])
+    SUPERVISOR.start_engines()
+    SUPERVISOR.start()
+    AUTOSCALER = EngineAutoscaler(ENGINE_POOLS, SUPERVISOR, logger, **conf['autoscale'])
+    AUTOSCALER.start()
 
-    for engine in ENGINE_LIST:
-        engine['process'].start()
+    shutdown_event = threading.Event()
+    register_signal_handler(lambda sig: shutdown_event.set())
+    signal.signal(signal.SIGHUP, lambda sig, frame: threading.Thread(target=reload_config, daemon=True).start())
     logger.info(f"Starting up listener on localhost:{conf['network']['port']} with mappings")
     
     global server_socket
@@ -286,9 +843,16 @@ def main(args):
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_socket.bind((server_ip,conf['network']['port']))
     server_socket.listen(MAX_CLIENT_N)
-    while True:
+    server_socket.settimeout(1.0)
+    listen_at = time()
+    logger.info(f'서버 시작 완료 : import[{main_at - STARTUP_AT:.2f}s] '
+                f'init[{listen_at - main_at:.2f}s] listen[{listen_at - STARTUP_AT:.2f}s] '
+                f'start_method[{multiprocessing.get_start_method()}]')
+    while not shutdown_event.is_set():
         try:
             client_socket,(server_ip,addr) = server_socket.accept()
+        except socket.timeout:
+            continue
         except Exception as ex:
             error_msg = f'{ex.__class__.__name__}:{ex}'
             logger.exception(error_msg)
@@ -296,9 +860,13 @@ def main(args):
         t= threading.Thread(target=handle_client,args=(client_socket,server_ip,addr))
         t.daemon=True
         t.start()
+
+    # 신규 접속 중단 후 진행 중인 세션 정리 및 엔진 종료
+    server_socket.close()
+    AUTOSCALER.stop_event.set()
+    SUPERVISOR.shutdown()
+    DISPATCHER.stop()
     listeners.listener_end(log_queue)
-    signal.signal(signal.SIGINT, signal_handler)
-    os.wait()
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -0,0 +1,240 @@
+import json
+import logging
+import queue
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import asr_process
+from asr_process import ASRConfig, ASRProcess, ChannelStream, deinterleave
+from compaction import OffsetMap
+
+SAMPLE_RATE = 8000
+
+class Segment:
+    def __init__(self, text, start, end, words=None):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.words = words
+        self.avg_logprob = -0.1
+        self.no_speech_prob = 0.01
+
+class FakeModel:
+    """인식한 오디오 길이를 텍스트로 돌려주는 WhisperModel"""
+
+    def __init__(self):
+        self.options = []
+
+    def transcribe(self, audio, **options):
+        self.options.append(options)
+        return iter([Segment(f' len{len(audio)}', 0.0, len(audio) / 16000)]), None
+
+@pytest.fixture(scope='module', autouse=True)
+def engine_modules():
+    asr_process.load_engine_modules()
+
+def make_engine(**config):
+    return ASRProcess('test:0', [queue.Queue(), queue.Queue()], logging.getLogger('test'),
+                      ASRConfig(sample_rate=SAMPLE_RATE, **config), preload=False)
+
+def make_stream():
+    return ChannelStream(0, asr_process.webrtcvad.Vad(1))
+
+def set_lag(engine, seconds):
+    engine.audio_received.value = int(seconds * SAMPLE_RATE * 2)
+    engine.audio_processed.value = 0
+
+def voiced(seconds):
+    """VAD가 음성으로 판단하는 배음 신호 (16bit PCM)"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 15))
+    return (signal / np.abs(signal).max() * 12000).astype('<i2').tobytes()
+
+def silence(seconds):
+    return bytes(int(seconds * SAMPLE_RATE) * 2)
+
+def results(engine):
+    packets = []
+    while not engine.data_out.empty():
+        packets.append(engine.data_out.get_nowait())
+    return packets
+
+def test_drop_oldest_keeps_speech_in_backlog():
+    engine = make_engine(backlog_policy='drop_oldest', lag_threshold=1.0)
+    set_lag(engine, 10.0)
+    stream = make_stream()
+    engine.process_stream(stream, silence(1.0) + voiced(2.0) + silence(1.0), FakeModel())
+
+    (code, text), = results(engine)
+    # 앞의 무음만 건너뛰고 음성 구간은 원래 시간으로 인식
+    assert code == '%R'
+    assert text.startswith('1.0 ')
+    assert sum(stream.speech_flags) > 0
+    assert not any(stream.speech_flags[:30])
+
+def test_drop_oldest_skips_silent_backlog():
+    engine = make_engine(backlog_policy='drop_oldest', lag_threshold=1.0)
+    set_lag(engine, 10.0)
+    stream = make_stream()
+    engine.process_stream(stream, silence(2.0), FakeModel())
+
+    frames = len(silence(2.0)) // engine.config.frame_size
+    assert stream.vad_index == frames * engine.config.frame_size
+    assert len(stream.speech_flags) == frames and not any(stream.speech_flags)
+    # 건너뛴 프레임은 음성 구간 검출(무음 길이 계산)에 사용하지 않음
+    assert stream.silence_cnt == 0
+    assert results(engine) == []
+
+def test_drop_oldest_only_when_lagging():
+    engine = make_engine(backlog_policy='drop_oldest', lag_threshold=1.0)
+    set_lag(engine, 0.5)
+    stream = make_stream()
+    engine.process_stream(stream, silence(1.0), FakeModel())
+
+    assert stream.silence_cnt == len(silence(1.0)) // engine.config.frame_size
+
+def test_block_processes_backlog():
+    engine = make_engine(backlog_policy='block', lag_threshold=1.0)
+    set_lag(engine, 10.0)
+    stream = make_stream()
+    model = FakeModel()
+    engine.process_stream(stream, silence(1.0) + voiced(2.0) + silence(1.0), model)
+
+    assert [code for code, _ in results(engine)] == ['%R']
+    assert stream.silence_cnt > 0
+    assert model.options[0]['beam_size'] == 5
+
+@pytest.mark.parametrize('policy, lag, beam_size', [
+    ('shed', 10.0, 1),
+    ('shed', 0.5, 5),
+    ('block', 10.0, 5),
+    ('drop_oldest', 10.0, 5),
+])
+def test_decode_options(policy, lag, beam_size):
+    engine = make_engine(backlog_policy=policy, lag_threshold=1.0)
+    set_lag(engine, lag)
+
+    assert engine.get_decode_options()['beam_size'] == beam_size
+
+def test_shed_decodes_greedy_while_lagging():
+    engine = make_engine(backlog_policy='shed', lag_threshold=1.0)
+    set_lag(engine, 10.0)
+    model = FakeModel()
+    engine.process_stream(make_stream(), voiced(2.0) + silence(1.0), model)
+
+    assert [code for code, _ in results(engine)] == ['%R']
+    assert model.options[0]['beam_size'] == 1 and model.options[0]['best_of'] == 1
+
+def interleave(*channels):
+    """채널별 16bit PCM을 인터리브 PCM으로 결합"""
+    samples = [np.frombuffer(channel, dtype='<i2') for channel in channels]
+    return np.stack(samples, axis=1).astype('<i2').tobytes()
+
+def test_deinterleave_splits_channels():
+    left = np.arange(0, 8, dtype='<i2').tobytes()
+    right = np.arange(100, 108, dtype='<i2').tobytes()
+    # 채널 수의 배수가 되지 않는 뒤쪽 바이트(샘플 하나 + 1바이트)는 다음 패킷으로 넘김
+    pcm = bytearray(interleave(left, right) + b'\x01\x00\x02')
+
+    (left_out, right_out), rest = deinterleave(pcm, 2)
+    assert left_out == left and right_out == right
+    assert rest == b'\x01\x00\x02'
+
+def test_deinterleave_joins_partial_frames_across_packets():
+    left, right = voiced(0.1), silence(0.1)
+    pcm = interleave(left, right)
+    outputs = [bytearray(), bytearray()]
+    pending = bytearray()
+    for i in range(0, len(pcm), 333):
+        pending.extend(pcm[i:i + 333])
+        bufs, pending = deinterleave(pending, 2)
+        for output, buf in zip(outputs, bufs):
+            output.extend(buf)
+
+    assert outputs == [left, right]
+    assert pending == b''
+
+def test_multichannel_session_detects_speech_per_channel():
+    engine = make_engine()
+    pcm = interleave(silence(0.5) + voiced(2.0) + silence(1.0), silence(3.5))
+    for i in range(0, len(pcm), 1001):
+        engine.data_in.put((b'%s', pcm[i:i + 1001]))
+    engine.data_in.put((b'%f', None))
+    engine.run_session('user', asr_process.webrtcvad.Vad(), FakeModel(), channels=2)
+
+    (code, text), finish = results(engine)
+    assert code == '%R' and text.startswith('0.5 ') and ' ch0 : ' in text
+    assert finish == ('%F', None)
+
+def word(text, start, end, probability=0.9):
+    return SimpleNamespace(word=text, start=start, end=end, probability=probability)
+
+def json_engine(word_timestamps):
+    engine = make_engine()
+    engine.result_format = 'json'
+    engine.word_timestamps = word_timestamps
+    return engine
+
+def test_json_result_times_follow_offset_map():
+    offset_map = OffsetMap(SAMPLE_RATE * 2)
+    offset_map.add(2 * SAMPLE_RATE * 2, 3 * SAMPLE_RATE * 2)   # 원래 2~5초
+    offset_map.add(10 * SAMPLE_RATE * 2, 2 * SAMPLE_RATE * 2)  # 원래 10~12초
+    segments = [Segment(' hello world', 0.5, 3.5, [word(' hello', 0.5, 1.0), word(' world', 3.2, 3.5, 0.8)])]
+
+    result = json.loads(json_engine(True).build_json_result(
+        segments, ' hello world', offset_map.to_original, offset_map.start, offset_map.end))
+
+    assert (result['start'], result['end'], result['text']) == (2.0, 12.0, 'hello world')
+    segment, = result['segments']
+    # 압축으로 줄어든 무음(5~10초) 뒤의 시간은 원래 스트림 기준
+    assert (segment['start'], segment['end']) == (2.5, 10.5)
+    assert segment['confidence'] == 0.905 and segment['no_speech_prob'] == 0.01
+    assert segment['words'] == [
+        {'start': 2.5, 'end': 3.0, 'word': ' hello', 'probability': 0.9},
+        {'start': 10.2, 'end': 10.5, 'word': ' world', 'probability': 0.8},
+    ]
+    assert 'channel' not in result
+
+def test_json_result_without_words():
+    segments = [Segment(' hello', 0.0, 1.0, [word(' hello', 0.0, 1.0)])]
+    result = json.loads(json_engine(False).build_json_result(
+        segments, ' hello', lambda seconds: 4.0 + seconds, 4.0, 5.0))
+
+    segment, = result['segments']
+    assert 'words' not in segment
+    assert (segment['start'], segment['end']) == (4.0, 5.0)
+
+class WordModel(FakeModel):
+    """인식한 오디오 전체를 단어 하나로 돌려주는 WhisperModel"""
+
+    def transcribe(self, audio, **options):
+        self.options.append(options)
+        duration = self.duration = len(audio) / 16000
+        words = [word(' hi', 0.0, duration)] if options['word_timestamps'] else None
+        return iter([Segment(' hi', 0.0, duration, words)]), None
+
+@pytest.mark.parametrize('word_timestamps', [True, False])
+def test_json_session_with_compaction(word_timestamps):
+    engine = make_engine(compact_silence=True, compact_gap_ms=60, compact_edge_ms=30)
+    model = WordModel()
+    pcm = silence(0.5) + voiced(1.0) + silence(0.45) + voiced(1.0) + silence(1.0)
+    engine.data_in.put((b'%s', pcm))
+    engine.data_in.put((b'%f', None))
+    engine.run_session('user', asr_process.webrtcvad.Vad(), model,
+                       result_format='json', word_timestamps=word_timestamps)
+
+    (code, data), finish = results(engine)
+    assert code == '%R' and finish == ('%F', None)
+    assert model.options[0]['word_timestamps'] == word_timestamps
+    result = json.loads(data)
+    segment, = result['segments']
+    # 인식한(압축한) 오디오보다 긴 원래 스트림 구간으로 변환
+    assert (segment['start'], segment['end']) == (result['start'], result['end'])
+    assert result['end'] - result['start'] >= model.duration + 0.2
+    if word_timestamps:
+        assert segment['words'] == [{'start': segment['start'], 'end': segment['end'],
+                                     'word': ' hi', 'probability': 0.9}]
+    else:
+        assert 'words' not in segment
@@ -0,0 +1,58 @@
+from compaction import OffsetMap, compact_segment
+
+# 프레임 하나 = 4바이트 = 1초 (sample_rate 2, 16bit)
+FRAME = 4
+RATE = 2
+
+def frames(*indexes):
+    return bytearray(b''.join(bytes([i]) * FRAME for i in indexes))
+
+def test_offset_map_to_original():
+    offset_map = OffsetMap(FRAME)
+    offset_map.add(2 * FRAME, 3 * FRAME)   # 원래 2~5초
+    offset_map.add(10 * FRAME, 2 * FRAME)  # 원래 10~12초
+
+    assert offset_map.to_original(0) == 2
+    assert offset_map.to_original(1.5) == 3.5
+    assert offset_map.to_original(3) == 10
+    assert offset_map.to_original(4.5) == 11.5
+    # 압축 오디오 끝 이후는 마지막 구간의 끝
+    assert offset_map.to_original(9) == 12
+    assert (offset_map.start, offset_map.end) == (2, 12)
+
+def test_all_silence_is_unchanged():
+    wav = frames(*range(4))
+    compact, offset_map = compact_segment(wav, 0, len(wav), bytearray(4), FRAME, RATE, 2, 1)
+
+    assert compact == wav
+    assert (offset_map.start, offset_map.end) == (0, 4)
+
+def test_long_gap_is_shortened_and_edges_trimmed():
+    speech = [0, 0, 0, 1, 1] + [0] * 10 + [1, 1, 0, 0, 0]
+    wav = frames(*range(len(speech)))
+    compact, offset_map = compact_segment(wav, 0, len(wav), bytearray(speech), FRAME, RATE,
+                                          gap_frames=2, edge_frames=1)
+
+    # 앞뒤 무음은 1프레임, 구간 안의 무음은 앞뒤로 1프레임씩만 남김
+    assert compact == frames(2, 3, 4, 5, 14, 15, 16, 17)
+    assert offset_map.start == 2
+    assert offset_map.to_original(4) == 14
+    assert offset_map.end == 18
+
+def test_short_gap_is_kept():
+    speech = [1, 0, 0, 1]
+    wav = frames(*range(len(speech)))
+    compact, offset_map = compact_segment(wav, 0, len(wav), bytearray(speech), FRAME, RATE, 2, 1)
+
+    assert compact == wav
+    assert offset_map.to_original(2) == 2
+
+def test_segment_inside_session_and_unjudged_frames():
+    # 세션 중간 구간 (4~8프레임), 판단하지 않은 7프레임은 음성으로 취급
+    speech = [1, 1, 1, 1, 0, 0, 1]
+    wav = frames(*range(8))
+    compact, offset_map = compact_segment(wav, 4 * FRAME, 8 * FRAME, bytearray(speech),
+                                          FRAME, RATE, 2, 0)
+
+    assert compact == frames(6, 7)
+    assert (offset_map.start, offset_map.end) == (6, 8)
@@ -0,0 +1,47 @@
+import cpu_topology
+from cpu_topology import CpuPlanner, parse_cpulist
+
+def make_planner(monkeypatch, engine_count, nodes, **kwargs):
+    monkeypatch.setattr(cpu_topology, 'numa_nodes', lambda cpus=None: nodes)
+    cpus = sorted(cpu for node_cpus in nodes.values() for cpu in node_cpus)
+    return CpuPlanner(engine_count, cpus=cpus, **kwargs)
+
+def test_parse_cpulist():
+    assert parse_cpulist('0-3,8,10-11\n') == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpulist('') == []
+
+def test_threads_per_engine_from_core_count(monkeypatch):
+    planner = make_planner(monkeypatch, 3, {0: list(range(8))})
+    assert planner.threads == 2
+    planner = make_planner(monkeypatch, 16, {0: list(range(8))})
+    assert planner.threads == 1
+
+def test_slots_alternate_numa_nodes(monkeypatch):
+    planner = make_planner(monkeypatch, 4, {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}, pin=True)
+    assert planner.slots == [[0, 1], [4, 5], [2, 3], [6, 7]]
+
+def test_assign_without_pin(monkeypatch):
+    planner = make_planner(monkeypatch, 2, {0: [0, 1, 2, 3]})
+    assert planner.assign('ko:0') is None
+    assert planner.assigned == {}
+
+def test_assign_balances_and_keeps_name(monkeypatch):
+    planner = make_planner(monkeypatch, 2, {0: [0, 1, 2, 3]}, pin=True)
+    assert planner.assign('ko:0') == [0, 1]
+    assert planner.assign('ko:1') == [2, 3]
+    # 재시작/교체된 엔진은 같은 CPU 집합 사용
+    assert planner.assign('ko:0') == [0, 1]
+    # slot보다 엔진이 많으면 가장 적게 쓰인 slot부터
+    assert planner.assign('en:0') == [0, 1]
+    assert planner.assign('en:1') == [2, 3]
+
+def test_release_frees_slot(monkeypatch):
+    planner = make_planner(monkeypatch, 2, {0: [0, 1, 2, 3]}, pin=True)
+    planner.assign('ko:0')
+    planner.assign('ko:1')
+    planner.assign('ko:2')
+    planner.release('ko:1')
+    planner.release('ko:9')
+    assert 'ko:1' not in planner.assigned
+    # 반환된 slot이 다시 가장 적게 쓰인 slot
+    assert planner.assign('ko:3') == [2, 3]
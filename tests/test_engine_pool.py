@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from engine_pool import EnginePool, PoolManager
+from qos import PriorityClass, Ticket
+
+logger = logging.getLogger('test')
+
+class FakeProcess:
+    def __init__(self, engine_name, config):
+        self.engine_name = engine_name
+        self.config = config
+
+def make_manager(memory_budget_mb=0, aging=0.0):
+    return PoolManager([], logger, memory_budget_mb, aging)
+
+def make_pool(manager, name, memory_mb, channel=1, loaded=False):
+    config = SimpleNamespace(model_size='small', language=name)
+    pool = EnginePool(name, config, channel, memory_mb)
+    manager.add_pool(pool)
+    engines = []
+    for i in range(channel):
+        engine = manager.add_engine(pool, FakeProcess(pool.next_engine_name(), config), loaded=loaded)
+        engine['state'] = 'ready'
+        engines.append(engine)
+    return pool, engines
+
+def test_warm_engine_is_allocated_first():
+    manager = make_manager()
+    pool, (cold, warm) = make_pool(manager, 'ko', 600, channel=2)
+    warm['loaded'] = True
+
+    assert manager.try_allocate(pool) is warm
+    assert warm['running']
+    assert manager.try_allocate(pool) is cold
+    assert manager.try_allocate(pool) is None
+
+def test_make_room_requests_unload_of_least_recently_used_engine():
+    manager = make_manager(memory_budget_mb=1000)
+    ko, (ko_engine,) = make_pool(manager, 'ko', 400, loaded=True)
+    en, (en_engine,) = make_pool(manager, 'en', 400, loaded=True)
+    ja, (ja_engine,) = make_pool(manager, 'ja', 400)
+    ko_engine['last_used'] = 1.0
+    en_engine['last_used'] = 2.0
+
+    # 해제 완료 전에는 메모리를 사용 중으로 계산하므로 할당하지 않음
+    assert manager.try_allocate(ja) is None
+    assert ko_engine['state'] == 'unloading'
+    assert ko_engine['unload']
+    assert ko_engine['loaded']
+    assert en_engine['state'] == 'ready'
+    assert manager.loaded_memory() == 800
+
+    # 같은 엔진에 해제를 다시 요청하지 않음
+    ko_engine.pop('unload')
+    assert manager.try_allocate(ja) is None
+    assert 'unload' not in ko_engine
+    assert en_engine['state'] == 'ready'
+
+    # 엔진이 해제를 알린 뒤(EngineSupervisor.on_unloaded) 할당
+    ko_engine['loaded'] = False
+    ko_engine['state'] = 'ready'
+    assert manager.try_allocate(ja) is ja_engine
+    assert manager.loaded_memory() == 800
+
+def test_make_room_never_unloads_running_engines():
+    manager = make_manager(memory_budget_mb=500)
+    ko, (ko_engine,) = make_pool(manager, 'ko', 400, loaded=True)
+    en, (en_engine,) = make_pool(manager, 'en', 400)
+    ko_engine['running'] = True
+
+    assert manager.try_allocate(en) is None
+    assert ko_engine['state'] == 'ready'
+    assert 'unload' not in ko_engine
+
+def test_reserve_counts_against_budget():
+    manager = make_manager(memory_budget_mb=1000)
+    ko, (ko_engine,) = make_pool(manager, 'ko', 400, loaded=True)
+    en, (en_engine,) = make_pool(manager, 'en', 400)
+
+    assert manager.reserve(500, timeout=0)
+    assert manager.loaded_memory() == 900
+    # 확보한 메모리 때문에 유휴 엔진의 모델 해제를 요청하고 대기
+    assert manager.try_allocate(en) is None
+    assert ko_engine['state'] == 'unloading'
+    assert not manager.reserve(500, timeout=0)
+
+    manager.unreserve(500)
+    assert manager.loaded_memory() == 400
+
+def test_allocate_serves_waiters_by_priority():
+    manager = make_manager()
+    pool, (engine,) = make_pool(manager, 'ko', 600, loaded=True)
+    engine['running'] = True
+    order = []
+
+    def session(priority_class):
+        allocated = manager.allocate(pool, 5.0, Ticket(priority_class))
+        order.append(priority_class.name)
+        manager.release(allocated)
+
+    threads = []
+    for name, priority in (('batch', 2), ('normal', 1), ('realtime', 0)):
+        thread = threading.Thread(target=session, args=(PriorityClass(name, priority, 10.0),))
+        thread.start()
+        threads.append(thread)
+        while pool.waiting < len(threads):
+            time.sleep(0.01)
+
+    # 먼저 도착한 batch보다 우선순위가 높은 요청부터 할당
+    manager.release(engine)
+    for thread in threads:
+        thread.join(5)
+    assert order == ['realtime', 'normal', 'batch']
+    assert pool.waiting == 0
+
+def test_allocate_times_out():
+    manager = make_manager()
+    pool, (engine,) = make_pool(manager, 'ko', 600, loaded=True)
+    engine['running'] = True
+
+    assert manager.allocate(pool, 0.1, Ticket(PriorityClass('normal'))) is None
+    assert pool.waiting == 0
+
+def test_allocate_skips_engines_running_another_model():
+    manager = make_manager()
+    pool, (old, new) = make_pool(manager, 'ko', 600, channel=2, loaded=True)
+    # 설정 변경으로 교체된 엔진은 풀 설정이 바뀌기 전까지 할당하지 않음
+    new['process'].config = SimpleNamespace(model_size='medium', language='ko')
+    old['running'] = True
+
+    assert manager.try_allocate(pool) is None
+    pool.config = new['process'].config
+    assert manager.try_allocate(pool) is new
+
+def test_cold_engine_counts_as_loaded_only_after_engine_reports():
+    manager = make_manager(memory_budget_mb=1000)
+    pool, (engine,) = make_pool(manager, 'ko', 600)
+
+    assert manager.try_allocate(pool) is engine
+    assert not engine['loaded']
+    assert manager.loaded_memory() == 600
+
+    # 오디오를 보내기 전에 끝난 세션 : 엔진이 모델을 로드하지 않으므로 메모리 반환
+    manager.release(engine)
+    assert manager.loaded_memory() == 0
+
+    # 세션이 시작된 경우는 엔진이 로드를 알릴 때(EngineSupervisor.on_loaded)까지 유지
+    assert manager.try_allocate(pool) is engine
+    manager.release(engine, started=True)
+    assert manager.loaded_memory() == 600
+    assert not engine['loaded']
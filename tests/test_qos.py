@@ -0,0 +1,51 @@
+from qos import PriorityClass, QosStats, Ticket, load_classes, percentile
+
+REALTIME = PriorityClass('realtime', 0, 1.0)
+BATCH = PriorityClass('batch', 2, 60.0)
+
+def test_rank_orders_by_priority_then_deadline():
+    realtime, batch = Ticket(REALTIME), Ticket(BATCH)
+    urgent = Ticket(PriorityClass('urgent', 2, 0.5))
+    now = realtime.arrival
+
+    assert realtime.rank(now, 0) < urgent.rank(now, 0) < batch.rank(now, 0)
+
+def test_aging_raises_priority_of_waiting_tickets():
+    batch = Ticket(BATCH)
+    realtime = Ticket(REALTIME)
+    batch.arrival -= 25.0
+
+    # aging 10초: 25초 기다린 batch는 두 단계 올라 realtime과 같은 우선순위
+    assert batch.rank(realtime.arrival, 10.0)[0] == 0
+    # 같은 우선순위에서는 마감이 빠른 realtime이 먼저
+    assert realtime.rank(realtime.arrival, 10.0) < batch.rank(realtime.arrival, 10.0)
+    batch.arrival -= 10.0
+    assert batch.rank(realtime.arrival, 10.0) < realtime.rank(realtime.arrival, 10.0)
+    # aging을 사용하지 않으면 그대로
+    assert batch.rank(realtime.arrival, 0)[0] == 2
+
+def test_percentile():
+    assert percentile([], 0.95) == 0.0
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(list(range(100)), 0.95) == 95
+    assert percentile([1, 2], 1.0) == 2
+
+def test_stats_separate_timeouts_from_served_sessions():
+    stats = QosStats()
+    served = Ticket(REALTIME)
+    stats.record_wait(served, served.arrival + 0.5)
+    late = Ticket(REALTIME)
+    stats.record_wait(late, late.arrival + 2.0)
+    stats.record_timeout(Ticket(REALTIME))
+    stats.record_latencies('realtime', [0.2, 0.4])
+
+    summary, = stats.summary()
+    assert summary.startswith('class realtime: sessions[2] deadline_miss[1] timeouts[1] ')
+    assert 'wait_p95[2.00s]' in summary
+    assert 'latency_p50[0.40s]' in summary
+
+def test_load_classes():
+    classes = load_classes({'classes': {'realtime': {'priority': 0, 'deadline': 1.0}}})
+    assert list(classes) == ['realtime']
+    assert (classes['realtime'].priority, classes['realtime'].deadline) == (0, 1.0)
+    assert load_classes({}) == {}
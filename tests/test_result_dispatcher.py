@@ -0,0 +1,138 @@
+import logging
+import multiprocessing
+import socket
+from multiprocessing import Pipe
+from time import sleep, time
+
+import pytest
+
+from result_dispatcher import ResultDispatcher, ResultSession
+
+class FakeEngine:
+    """ASRProcess의 결과 출력 부분 (출력 큐 + 결과 도착 알림 pipe)"""
+
+    def __init__(self):
+        self.engine_name = 'test:0'
+        self.data_out = multiprocessing.Queue()
+        self.result_notify, self.result_notify_send = Pipe(duplex=False)
+
+    def emit(self, code, data=None):
+        self.data_out.put((code, data))
+        self.result_notify_send.send_bytes(b'\0')
+
+def recv_packets(sock, count=None, timeout=5.0):
+    """%F 또는 count개까지 패킷 수신"""
+    sock.settimeout(timeout)
+    packets = []
+    buffer = b''
+    while count is None or len(packets) < count:
+        while len(buffer) < 6 or len(buffer) < 6 + int(buffer[2:6], 16):
+            data = sock.recv(4096)
+            if not data:
+                return packets
+            buffer += data
+        length = int(buffer[2:6], 16)
+        code, data = buffer[:2].decode(), buffer[6:6 + length].decode()
+        buffer = buffer[6 + length:]
+        packets.append((code, data))
+        if code == '%F':
+            break
+    return packets
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = ResultDispatcher(logging.getLogger('test'))
+    dispatcher.start()
+    yield dispatcher
+    dispatcher.stop()
+    dispatcher.join(5)
+
+def test_results_delivered_in_order(dispatcher):
+    engine = FakeEngine()
+    server, client = socket.socketpair()
+    session = ResultSession(server, engine, 'user')
+    # 등록 전에 도착한 결과도 전달
+    engine.emit('%R', '0.0 1.0 : a')
+    dispatcher.register(session)
+    engine.emit('%R', '1.0 2.0 : b')
+    engine.emit('%F')
+
+    assert recv_packets(client) == [('%R', '0.0 1.0 : a'), ('%R', '1.0 2.0 : b'), ('%F', '')]
+    assert session.done.wait(5)
+    assert client.recv(1) == b''
+
+def test_posted_packets_share_the_stream(dispatcher):
+    engine = FakeEngine()
+    server, client = socket.socketpair()
+    session = ResultSession(server, engine, 'user')
+    dispatcher.register(session)
+    engine.emit('%R', '0.0 1.0 : a')
+    assert recv_packets(client, 1) == [('%R', '0.0 1.0 : a')]
+    dispatcher.post(session, '%E', '{"status": "BEHIND"}')
+    engine.emit('%F')
+
+    assert recv_packets(client) == [('%E', '{"status": "BEHIND"}'), ('%F', '')]
+
+def test_detach_with_reason_waits_for_engine_finish(dispatcher):
+    engine = FakeEngine()
+    server, client = socket.socketpair()
+    session = ResultSession(server, engine, 'user')
+    dispatcher.register(session)
+    dispatcher.detach(session, 'TIME_OUT', resume=False)
+
+    assert recv_packets(client) == [('%F', 'TIME_OUT')]
+    # 엔진이 세션을 끝내기 전에는 세션을 끝내지 않음 (엔진 반환 전 이전 결과 정리)
+    engine.emit('%R', '0.0 1.0 : late')
+    assert not session.done.wait(0.3)
+    engine.emit('%F')
+    assert session.done.wait(5)
+
+def test_unregister_finishes_immediately(dispatcher):
+    engine = FakeEngine()
+    server, client = socket.socketpair()
+    session = ResultSession(server, engine, 'user')
+    dispatcher.register(session)
+    dispatcher.unregister(session)
+
+    assert session.done.wait(5)
+    assert client.recv(1) == b''
+
+def test_attach_replays_unconfirmed_packets(dispatcher):
+    engine = FakeEngine()
+    server, client = socket.socketpair()
+    session = ResultSession(server, engine, 'user', resumable=True)
+    dispatcher.register(session)
+    engine.emit('%R', '0.0 1.0 : a')
+    assert recv_packets(client, 1) == [('%R', '0.0 1.0 : a')]
+
+    # 연결이 끊긴 동안의 결과는 보관
+    dispatcher.detach(session)
+    engine.emit('%R', '1.0 2.0 : b')
+    engine.emit('%F')
+    assert not session.done.wait(0.3)
+
+    # 클라이언트가 받은 1개 이후부터 다시 전송
+    server, client = socket.socketpair()
+    dispatcher.attach(session, server, 1)
+    assert recv_packets(client) == [('%R', '1.0 2.0 : b'), ('%F', '')]
+    assert session.done.wait(5)
+    assert session.history_base == 1
+
+def test_history_keeps_only_recent_packets(dispatcher):
+    engine = FakeEngine()
+    server, client = socket.socketpair()
+    session = ResultSession(server, engine, 'user', resumable=True, history_limit=2)
+    dispatcher.register(session)
+    dispatcher.detach(session)
+    for i in range(4):
+        engine.emit('%R', f'{i}.0 {i}.5 : {i}')
+    engine.emit('%F')
+    deadline = time() + 5
+    while not session.finished and time() < deadline:
+        sleep(0.01)
+
+    # 보관 한도를 넘은 결과는 다시 보내지 않음
+    server, client = socket.socketpair()
+    dispatcher.attach(session, server, 0)
+    assert recv_packets(client) == [('%R', '3.0 3.5 : 3'), ('%F', '')]
+    assert session.history_base == 3
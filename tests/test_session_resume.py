@@ -0,0 +1,36 @@
+import threading
+
+from session_resume import ResumableSession, SessionRegistry
+
+def test_find_checks_token_and_username():
+    registry = SessionRegistry()
+    session = ResumableSession('user')
+    registry.add(session, 'result_session')
+
+    assert registry.find(session.token, 'user') is session
+    assert session.result_session == 'result_session'
+    assert registry.find(session.token, 'other') is None
+    assert registry.find('unknown', 'user') is None
+
+    registry.remove(session)
+    assert registry.find(session.token, 'user') is None
+
+def test_resume_hands_socket_to_waiting_session():
+    registry = SessionRegistry()
+    session = ResumableSession('user')
+    registry.add(session, None)
+
+    threading.Timer(0.1, registry.resume, (session, 'socket', 3)).start()
+    assert registry.wait_resume(session, 5) == 'socket'
+    assert session.received == 3
+    # 넘겨준 소켓은 다시 받지 않음
+    assert registry.wait_resume(session, 0) is None
+
+def test_resume_fails_after_removal():
+    registry = SessionRegistry()
+    session = ResumableSession('user')
+    registry.add(session, None)
+    registry.remove(session)
+
+    assert not registry.resume(session, 'socket', 0)
+    assert registry.wait_resume(session, 0) is None
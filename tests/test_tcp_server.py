@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import tcp_server
+
+class FakeProcess:
+    engine_name = 'test:0'
+
+    def __init__(self, lag_threshold):
+        self.config = SimpleNamespace(lag_threshold=lag_threshold)
+        self.lag = 0.0
+
+    def lag_seconds(self):
+        return self.lag
+
+class FakeDispatcher:
+    def __init__(self):
+        self.posted = []
+
+    def post(self, session, code, data):
+        self.posted.append((code, json.loads(data)))
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    dispatcher = FakeDispatcher()
+    monkeypatch.setattr(tcp_server, 'DISPATCHER', dispatcher)
+    return dispatcher
+
+def test_lag_status_sent_on_change(dispatcher):
+    process = FakeProcess(2.0)
+    session = SimpleNamespace(username='user')
+    lag_state = {'behind': False, 'max': 0.0, 'status': True}
+
+    for lag in (1.0, 2.5, 3.0, 1.5, 0.5):
+        process.lag = lag
+        tcp_server.check_session_lag(process, session, lag_state)
+
+    # 기준을 넘을 때 BEHIND, 기준의 절반 아래로 내려올 때 NORMAL (한 번씩만)
+    assert dispatcher.posted == [('%E', {'status': 'BEHIND', 'lag': 2.5}),
+                                 ('%E', {'status': 'NORMAL', 'lag': 0.5})]
+    assert lag_state['max'] == 3.0
+    assert not lag_state['behind']
+
+def test_lag_status_only_when_requested(dispatcher):
+    process = FakeProcess(2.0)
+    lag_state = {'behind': False, 'max': 0.0, 'status': False}
+    process.lag = 5.0
+    tcp_server.check_session_lag(process, SimpleNamespace(username='user'), lag_state)
+
+    assert lag_state['behind']
+    assert dispatcher.posted == []
+
+@pytest.mark.parametrize('options, channels, reason', [
+    ({}, 1, None),
+    ({'channels': '2'}, 2, None),
+    ({'channels': '3'}, None, 'UNSUPPORTED_CHANNELS'),
+    ({'channels': '0'}, None, 'UNSUPPORTED_CHANNELS'),
+    ({'channels': 'x'}, None, 'UNSUPPORTED_CHANNELS'),
+])
+def test_session_channels_limited_by_max_channels(monkeypatch, options, channels, reason):
+    monkeypatch.setattr(tcp_server, 'conf', {'audio': {'max_channels': 2}}, raising=False)
+    session_options, error = tcp_server.get_session_options(options)
+
+    assert error == reason
+    assert (session_options or {}).get('channels') == channels
@@ -30,32 +30,21 @@ def make_folder(folder_name):
     if not os.path.isdir(folder_name):
         os.mkdir(folder_name)
 
-def signal_handler(sig, frame):
+def register_signal_handler(callback):
     """
-    Ctrl+C 시그널 처리 핸들러
-    프로세스와 리스너를 안전하게 종료
+    종료 시그널(SIGINT, SIGTERM) 처리 핸들러 등록
     
     Parameters
     ----------
-    sig : signal
-        수신된 시그널
-    frame : frame
-        현재 스택 프레임
+    callback : callable
+        시그널 수신 시 호출할 함수. 인자로 시그널 번호를 받음
     """
-    global childs, listeners
-    print('Ctrl+C가 입력되었습니다!')
-    
-    # 모든 자식 프로세스 종료
-    for child in childs:
-        os.kill(child, signal.SIGKILL)
-    
-    # 모든 리스너 종료    
-    for listener in listeners:
-        os.kill(listener.pid, signal.SIGTERM)
-    
-    # 현재 프로세스 종료
-    os.kill(os.getpid(), signal.SIGKILL)
-    sys.exit(0)
+    def handler(sig, frame):
+        print(f'{signal.Signals(sig).name} 시그널 수신, 서버를 종료합니다')
+        callback(sig)
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, handler)
 
 def illegal_packet_error_log(client_socket, ip, addr, log_msg):
     """